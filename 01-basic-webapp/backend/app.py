@@ -10,12 +10,48 @@ Data is stored in-memory (resets when server restarts).
 In a real application, you would use a database.
 """
 
-from flask import Flask, request, jsonify
+import hashlib
+import itertools
+
+import msgpack
+import orjson
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 from flasgger import Swagger
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+
+    Used for parsing request bodies (request.get_json) and for anything
+    still serialized through Flask, e.g. jsonify in extensions.
+    orjson output is always compact.
+    """
+
+    # Never ask for indented output (Flask does in debug mode otherwise);
+    # orjson ignores indent anyway, this skips building the arguments
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Initialize Flask application
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Todos are tiny - reject request bodies over 8 KB with 413 before they are
+# read, so a client can't tie up the server with a huge upload.
+# (In production, a buffering reverse proxy like nginx also protects
+# against slow clients.)
+app.config['MAX_CONTENT_LENGTH'] = 8 * 1024
 
 # Enable CORS to allow requests from frontend (different port/origin)
 # Configure CORS to allow requests from any origin for development
@@ -23,10 +59,22 @@ CORS(app, resources={
     r"/api/*": {
         "origins": "*",
         "methods": ["GET", "POST", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type"],
+        "max_age": 86400  # browsers may reuse preflight (OPTIONS) answers for a day
     }
 })
 
+# Formats GET /api/todos can return. JSON is the default; clients that send
+# "Accept: application/msgpack" get the smaller, faster-to-parse MessagePack
+TODO_LIST_MIMETYPES = ['application/json', 'application/msgpack']
+
+# Gzip JSON responses for clients that send Accept-Encoding: gzip
+# (level 5 is a good balance between CPU time and size; very small
+# responses are sent uncompressed)
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 5
+Compress(app)
+
 # Configure Swagger UI for API documentation
 swagger_config = {
     "headers": [],
@@ -60,12 +108,33 @@ swagger_template = {
 
 swagger = Swagger(app, config=swagger_config, template=swagger_template)
 
+
+def make_json_response(data, status=200):
+    """
+    Serialize data with orjson and wrap it in the app's response class
+
+    orjson returns bytes directly, so Werkzeug can send them as-is
+    without going through the stdlib json module like jsonify() does.
+    Building the response ourselves also skips jsonify's config lookups
+    and pretty-printing.
+    """
+    return app.response_class(orjson.dumps(data), status=status, mimetype='application/json')
+
+
+def make_error_response(message, status):
+    """Return a JSON error response like {"error": "Todo not found"}"""
+    return make_json_response({'error': message}, status)
+
+
 # In-memory storage for todos (will be reset when server restarts)
 # In production, you would use a database like PostgreSQL, MongoDB, etc.
-todos = []
+# Todos are keyed by ID so lookups and deletes don't scan all todos.
+# Dicts keep insertion order, so listing them still returns oldest first.
+todos_by_id = {}
 
-# Counter for generating unique IDs
-next_id = 1
+# Counter for generating unique IDs (1, 2, 3, ...)
+# next() on it is a single C call, so two threads can never get the same ID
+_id_counter = itertools.count(1)
 
 
 @app.route('/api/todos', methods=['GET'])
@@ -76,9 +145,12 @@ def get_todos():
     ---
     tags:
       - todos
+    produces:
+      - application/json
+      - application/msgpack
     responses:
       200:
-        description: A list of todos
+        description: A list of todos (MessagePack if requested with the Accept header)
         schema:
           type: array
           items:
@@ -93,7 +165,18 @@ def get_todos():
                 description: The todo text
                 example: "Learn Flask"
     """
-    return jsonify(todos), 200
+    todos = list(todos_by_id.values())
+
+    # Content negotiation: JSON unless the client prefers MessagePack
+    if request.accept_mimetypes.best_match(TODO_LIST_MIMETYPES) == 'application/msgpack':
+        response = app.response_class(msgpack.packb(todos, use_bin_type=True),
+                                      mimetype='application/msgpack')
+    else:
+        response = make_json_response(todos)
+
+    # Caches must not mix up the two formats
+    response.vary.add('Accept')
+    return response
 
 
 @app.route('/api/todos', methods=['POST'])
@@ -140,34 +223,35 @@ def create_todo():
             error:
               type: string
               example: "Missing text field"
+      413:
+        description: Request body is too large (over 8 KB)
     """
-    global next_id
+    # Get JSON data from request body (None if it is missing or not valid
+    # JSON). cache=False: the parsed body is only needed once.
+    data = request.get_json(silent=True, cache=False)
 
-    # Get JSON data from request body
-    data = request.json
+    # Validate that 'text' field exists (and is a string)
+    text = data.get('text') if isinstance(data, dict) else None
+    if not isinstance(text, str):
+        return make_error_response('Missing text field', 400)
 
-    # Validate that 'text' field exists
-    if not data or 'text' not in data:
-        return jsonify({'error': 'Missing text field'}), 400
-
-    # Validate that text is not empty
-    if not data['text'].strip():
-        return jsonify({'error': 'Text cannot be empty'}), 400
+    # Validate that text is not empty (strip once and reuse the result)
+    text = text.strip()
+    if not text:
+        return make_error_response('Text cannot be empty', 400)
 
     # Create new todo with unique ID
+    new_id = next(_id_counter)
     new_todo = {
-        'id': next_id,
-        'text': data['text'].strip()
+        'id': new_id,
+        'text': text
     }
 
-    # Add to our in-memory list
-    todos.append(new_todo)
-
-    # Increment ID counter for next todo
-    next_id += 1
+    # Add to our in-memory storage
+    todos_by_id[new_id] = new_todo
 
     # Return created todo with 201 status (Created)
-    return jsonify(new_todo), 201
+    return make_json_response(new_todo, 201)
 
 
 @app.route('/api/todos/<int:todo_id>', methods=['DELETE'])
@@ -197,19 +281,31 @@ def delete_todo(todo_id):
               type: string
               example: "Todo not found"
     """
-    global todos
+    # Look up and remove the todo in one step
+    if todos_by_id.pop(todo_id, None) is None:
+        return make_error_response('Todo not found', 404)
 
-    # Find the todo with matching ID
-    todo = next((t for t in todos if t['id'] == todo_id), None)
+    # Return empty response with 204 status (No Content). Built fresh each
+    # time: after_request hooks (CORS, compression) add headers to it in place
+    return app.response_class(status=204)
 
-    if todo is None:
-        return jsonify({'error': 'Todo not found'}), 404
 
-    # Remove todo from list (filter out the deleted todo)
-    todos = [t for t in todos if t['id'] != todo_id]
+@app.errorhandler(413)
+def request_too_large(error):
+    """Return a JSON error instead of Flask's HTML page for oversized bodies"""
+    return make_error_response('Request body too large', 413)
 
-    # Return empty response with 204 status (No Content)
-    return '', 204
+
+# The API information never changes, so it is serialized once at startup
+HOME_BODY = orjson.dumps({
+    'message': 'Todo List REST API',
+    'endpoints': {
+        'GET /api/todos': 'Get all todos',
+        'POST /api/todos': 'Create a new todo',
+        'DELETE /api/todos/<id>': 'Delete a todo'
+    }
+})
+HOME_ETAG = hashlib.sha1(HOME_BODY).hexdigest()
 
 
 @app.route('/')
@@ -217,21 +313,26 @@ def home():
     """
     Root endpoint - provides API information
     """
-    return jsonify({
-        'message': 'Todo List REST API',
-        'endpoints': {
-            'GET /api/todos': 'Get all todos',
-            'POST /api/todos': 'Create a new todo',
-            'DELETE /api/todos/<id>': 'Delete a todo'
-        }
-    })
+    response = app.response_class(HOME_BODY, mimetype='application/json')
+    response.set_etag(HOME_ETAG)
+    # Answers 304 Not Modified if the client already has this version
+    return response.make_conditional(request)
+
+
+# ASGI entry point: wraps the (WSGI) Flask app so it can be served by an
+# ASGI server such as uvicorn instead of Flask's single-threaded dev server
+asgi_app = WsgiToAsgi(app)
 
 
 # Run the application
 if __name__ == '__main__':
-    # debug=True enables auto-reload and detailed error messages
-    # Don't use debug=True in production!
-    print("Starting Flask server...")
+    import uvicorn
+
+    # uvicorn uses uvloop/httptools automatically when they are installed
+    # (uvicorn[standard]) and keeps client connections alive between requests.
+    # Note: Flask's debug mode (auto-reload, debugger) is not used here.
+    # For that during development, run: flask --app app run --debug --port 8000
+    print("Starting Flask app on uvicorn (ASGI)...")
     print("API will be available at: http://localhost:8000")
     print("\nAPI endpoints:")
     print("  GET    http://localhost:8000/api/todos")
@@ -243,4 +344,6 @@ if __name__ == '__main__':
     print("\nPress CTRL+C to stop the server")
     print("\nNote: Using port 8000 to avoid conflicts with system services")
 
-    app.run(debug=True, host='0.0.0.0', port=8000)
+    # A single worker: todos live in this process's memory, so several
+    # worker processes would each see a different todo list
+    uvicorn.run(asgi_app, host='0.0.0.0', port=8000, workers=1)
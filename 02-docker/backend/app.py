@@ -10,6 +10,8 @@ Data is stored in-memory (resets when server restarts).
 In a real application, you would use a database.
 """
 
+import os
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flasgger import Swagger
@@ -23,7 +25,8 @@ CORS(app, resources={
     r"/api/*": {
         "origins": "*",
         "methods": ["GET", "POST", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type"],
+        "max_age": 86400  # browsers may reuse preflight (OPTIONS) answers for a day
     }
 })
 
@@ -243,4 +246,7 @@ if __name__ == '__main__':
     print("\nPress CTRL+C to stop the server")
     print("\nNote: Using port 8000 and binding to 0.0.0.0 for Docker compatibility")
 
-    app.run(debug=True, host='0.0.0.0', port=8000)
+    # Debug mode (auto-reload + interactive debugger) is for development only:
+    # enable it with FLASK_DEBUG=1, e.g. docker run -e FLASK_DEBUG=1 ...
+    app.run(host='0.0.0.0', port=8000,
+            debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
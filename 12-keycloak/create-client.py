@@ -4,24 +4,13 @@ Keycloak Client Creation Script
 Automates client/application creation via Keycloak Admin REST API
 """
 
+import orjson
 import requests
 import sys
-import urllib3
 
-# SSL/TLS Configuration
-# Use INSECURE=True for staging/self-signed certificates
-# Use INSECURE=False for production Let's Encrypt certificates
-INSECURE = True
-
-if INSECURE:
-    # Disable SSL warnings when using self-signed certificates
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Configuration - CHANGE THESE VALUES
-KEYCLOAK_URL = "https://keycloak.ltu-m7011e-johan.se"
-REALM = "myapp"
-ADMIN_USER = "admin"
-ADMIN_PASSWORD = "admin-change-this-password"
+# Keycloak URL, realm, admin credentials and TLS settings are shared by all
+# scripts - CHANGE THEM in kc_common.py
+from kc_common import CLIENTS_URL, SESSION, get_admin_token
 
 # Client configuration
 CLIENT_ID = "my-frontend-app"
@@ -36,73 +25,48 @@ FRONTEND_URLS = [
 ]
 ROOT_URL = FRONTEND_URLS[0]  # Primary URL
 
+# Redirect URIs and web origins derived from FRONTEND_URLS (built once)
+REDIRECT_URIS = tuple(f"{url}/*" for url in FRONTEND_URLS)
+WEB_ORIGINS = tuple(FRONTEND_URLS)
 
-def get_admin_token():
-    """Get admin access token from Keycloak"""
-    print("Step 1: Authenticating as admin...")
+# Settings that are the same for every client we create
+CLIENT_TEMPLATE = {
+    "enabled": True,
+    "protocol": "openid-connect",
+    "redirectUris": REDIRECT_URIS,
+    "webOrigins": WEB_ORIGINS,
+    "standardFlowEnabled": True,
+    "directAccessGrantsEnabled": True,
+    "authorizationServicesEnabled": False
+}
 
-    url = f"{KEYCLOAK_URL}/realms/master/protocol/openid-connect/token"
-    data = {
-        "username": ADMIN_USER,
-        "password": ADMIN_PASSWORD,
-        "grant_type": "password",
-        "client_id": "admin-cli"
-    }
 
-    try:
-        response = requests.post(url, data=data, verify=not INSECURE)
-        response.raise_for_status()
-        print("✅ Admin token obtained\n")
-        return response.json()["access_token"]
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to get admin token: {e}")
-        print("Check your credentials and Keycloak URL.")
-        sys.exit(1)
-
-
-def create_client(token, client_id, client_name, client_type, root_url):
+def create_client(client_id, client_name, client_type, root_url):
     """Create a new client in Keycloak"""
     client_type_name = "confidential" if client_type == "confidential" else "public"
     app_type = "backend/API" if client_type == "confidential" else "frontend"
 
     print(f"Step 2: Creating {client_type_name} client '{client_id}' ({app_type})...")
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
-    # Build redirect URIs and web origins from FRONTEND_URLS
-    redirect_uris = [f"{url}/*" for url in FRONTEND_URLS]
-    web_origins = FRONTEND_URLS.copy()
-
     client_data = {
+        **CLIENT_TEMPLATE,
         "clientId": client_id,
         "name": client_name,
-        "enabled": True,
         "publicClient": client_type != "confidential",
-        "protocol": "openid-connect",
         "rootUrl": root_url,
         "baseUrl": root_url,
-        "redirectUris": redirect_uris,
-        "webOrigins": web_origins,
-        "standardFlowEnabled": True,
-        "directAccessGrantsEnabled": True,
-        "serviceAccountsEnabled": client_type == "confidential",
-        "authorizationServicesEnabled": False
+        "serviceAccountsEnabled": client_type == "confidential"
     }
 
-    url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/clients"
-
     try:
-        response = requests.post(url, json=client_data, headers=headers, verify=not INSECURE)
+        response = SESSION.post(CLIENTS_URL, data=orjson.dumps(client_data))
 
         if response.status_code == 201:
             print(f"✅ Client '{client_id}' created successfully\n")
 
             # If confidential client, get the client secret
             if client_type == "confidential":
-                secret = get_client_secret(token, client_id, headers)
+                secret = get_client_secret(client_id)
                 return secret
             return None
 
@@ -119,14 +83,13 @@ def create_client(token, client_id, client_name, client_type, root_url):
         sys.exit(1)
 
 
-def get_client_secret(token, client_id, headers):
+def get_client_secret(client_id):
     """Get the client secret for a confidential client"""
     print("Step 3: Retrieving client secret...")
 
     try:
         # Get the client's internal UUID
-        url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/clients?clientId={client_id}"
-        response = requests.get(url, headers=headers, verify=not INSECURE)
+        response = SESSION.get(f"{CLIENTS_URL}?clientId={client_id}")
         response.raise_for_status()
 
         clients = response.json()
@@ -137,8 +100,8 @@ def get_client_secret(token, client_id, headers):
         client_uuid = clients[0]["id"]
 
         # Get client secret
-        secret_url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/clients/{client_uuid}/client-secret"
-        secret_response = requests.get(secret_url, headers=headers, verify=not INSECURE)
+        secret_url = f"{CLIENTS_URL}/{client_uuid}/client-secret"
+        secret_response = SESSION.get(secret_url)
         secret_response.raise_for_status()
 
         client_secret = secret_response.json()["value"]
@@ -164,11 +127,11 @@ def main():
     print("=" * 40)
     print()
 
-    # Get admin token
-    token = get_admin_token()
+    # Get admin token (also used by SESSION for the following calls)
+    get_admin_token()
 
     # Create client
-    secret = create_client(token, CLIENT_ID, CLIENT_NAME, CLIENT_TYPE, ROOT_URL)
+    secret = create_client(CLIENT_ID, CLIENT_NAME, CLIENT_TYPE, ROOT_URL)
 
     print()
     print("=" * 40)
@@ -180,11 +143,11 @@ def main():
     print(f"Root URL: {ROOT_URL}")
     print()
     print("Valid Redirect URIs:")
-    for url in FRONTEND_URLS:
-        print(f"  - {url}/*")
+    for uri in REDIRECT_URIS:
+        print(f"  - {uri}")
     print()
     print("Web Origins:")
-    for url in FRONTEND_URLS:
+    for url in WEB_ORIGINS:
         print(f"  - {url}")
     print()
     print("Use this client in your application:")
@@ -4,58 +4,19 @@ Keycloak Realm Creation Script
 Automates realm creation via Keycloak Admin REST API
 """
 
+import orjson
 import requests
 import sys
-import urllib3
 
-# SSL/TLS Configuration
-# Use INSECURE=True for staging/self-signed certificates
-# Use INSECURE=False for production Let's Encrypt certificates
-INSECURE = True
+# Keycloak URL, realm, admin credentials and TLS settings are shared by all
+# scripts - CHANGE THEM in kc_common.py
+from kc_common import KEYCLOAK_URL, REALM, REALMS_URL, SESSION, get_admin_token
 
-if INSECURE:
-    # Disable SSL warnings when using self-signed certificates
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Configuration - CHANGE THESE VALUES
-KEYCLOAK_URL = "https://keycloak.ltu-m7011e-johan.se"
-REALM = "myapp"
-ADMIN_USER = "admin"
-ADMIN_PASSWORD = "admin-change-this-password"
-
-
-def get_admin_token():
-    """Get admin access token from Keycloak"""
-    print("Step 1: Authenticating as admin...")
-
-    url = f"{KEYCLOAK_URL}/realms/master/protocol/openid-connect/token"
-    data = {
-        "username": ADMIN_USER,
-        "password": ADMIN_PASSWORD,
-        "grant_type": "password",
-        "client_id": "admin-cli"
-    }
-
-    try:
-        response = requests.post(url, data=data, verify=not INSECURE)
-        response.raise_for_status()
-        print("✅ Admin token obtained\n")
-        return response.json()["access_token"]
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to get admin token: {e}")
-        print("Check your credentials and Keycloak URL.")
-        sys.exit(1)
-
-
-def create_realm(token, realm_name):
+def create_realm(realm_name):
     """Create a new realm in Keycloak"""
     print(f"Step 2: Creating realm '{realm_name}'...")
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
     realm_data = {
         "realm": realm_name,
         "enabled": True,
@@ -67,10 +28,8 @@ def create_realm(token, realm_name):
         "bruteForceProtected": True
     }
 
-    url = f"{KEYCLOAK_URL}/admin/realms"
-
     try:
-        response = requests.post(url, json=realm_data, headers=headers, verify=not INSECURE)
+        response = SESSION.post(REALMS_URL, data=orjson.dumps(realm_data))
 
         if response.status_code == 201:
             print(f"✅ Realm '{realm_name}' created successfully\n")
@@ -94,11 +53,11 @@ def main():
     print("=" * 40)
     print()
 
-    # Get admin token
-    token = get_admin_token()
+    # Get admin token (also used by SESSION for the following calls)
+    get_admin_token()
 
     # Create realm
-    create_realm(token, REALM)
+    create_realm(REALM)
 
     print("=" * 40)
     print("✅ Realm setup complete!")
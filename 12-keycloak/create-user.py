@@ -4,24 +4,13 @@ Keycloak User Creation Script
 Automates user creation via Keycloak Admin REST API
 """
 
+import orjson
 import requests
 import sys
-import urllib3
 
-# SSL/TLS Configuration
-# Use INSECURE=True for staging/self-signed certificates
-# Use INSECURE=False for production Let's Encrypt certificates
-INSECURE = True
-
-if INSECURE:
-    # Disable SSL warnings when using self-signed certificates
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Configuration - CHANGE THESE VALUES
-KEYCLOAK_URL = "https://keycloak.ltu-m7011e-johan.se"
-REALM = "myapp"
-ADMIN_USER = "admin"
-ADMIN_PASSWORD = "admin-change-this-password"
+# Keycloak URL, realm, admin credentials and TLS settings are shared by all
+# scripts - CHANGE THEM in kc_common.py
+from kc_common import KEYCLOAK_URL, REALM, SESSION, USERS_URL, get_admin_token
 
 # User details
 USERNAME = "testuser"
@@ -30,53 +19,28 @@ FIRST_NAME = "Test"
 LAST_NAME = "User"
 PASSWORD = "testpass123"
 
-
-def get_admin_token():
-    """Get admin access token from Keycloak"""
-    print("Step 1: Authenticating as admin...")
-
-    url = f"{KEYCLOAK_URL}/realms/master/protocol/openid-connect/token"
-    data = {
-        "username": ADMIN_USER,
-        "password": ADMIN_PASSWORD,
-        "grant_type": "password",
-        "client_id": "admin-cli"
-    }
-
-    try:
-        response = requests.post(url, data=data, verify=not INSECURE)
-        response.raise_for_status()
-        print("✅ Admin token obtained\n")
-        return response.json()["access_token"]
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to get admin token: {e}")
-        print("Check your credentials and Keycloak URL.")
-        sys.exit(1)
+# Settings that are the same for every user we create
+USER_TEMPLATE = {
+    "enabled": True,
+    "emailVerified": True
+}
 
 
-def create_user(token, username, email, first_name, last_name, password):
+def create_user(username, email, first_name, last_name, password):
     """Create a new user in Keycloak"""
     print(f"Step 2: Creating user '{username}'...")
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
     # Create user
     user_data = {
+        **USER_TEMPLATE,
         "username": username,
         "email": email,
         "firstName": first_name,
-        "lastName": last_name,
-        "enabled": True,
-        "emailVerified": True
+        "lastName": last_name
     }
 
-    url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/users"
-
     try:
-        response = requests.post(url, json=user_data, headers=headers, verify=not INSECURE)
+        response = SESSION.post(USERS_URL, data=orjson.dumps(user_data))
 
         if response.status_code == 201:
             # Get user ID from Location header
@@ -90,8 +54,8 @@ def create_user(token, username, email, first_name, last_name, password):
                 "value": password,
                 "temporary": False
             }
-            pwd_url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/users/{user_id}/reset-password"
-            pwd_response = requests.put(pwd_url, json=password_data, headers=headers, verify=not INSECURE)
+            pwd_url = f"{USERS_URL}/{user_id}/reset-password"
+            pwd_response = SESSION.put(pwd_url, data=orjson.dumps(password_data))
 
             if pwd_response.status_code == 204:
                 print("✅ Password set successfully\n")
@@ -118,12 +82,11 @@ def main():
     print("=" * 40)
     print()
 
-    # Get admin token
-    token = get_admin_token()
+    # Get admin token (also used by SESSION for the following calls)
+    get_admin_token()
 
     # Create user
     create_user(
-        token=token,
         username=USERNAME,
         email=EMAIL,
         first_name=FIRST_NAME,
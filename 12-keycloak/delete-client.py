@@ -6,62 +6,24 @@ Deletes a client via Keycloak Admin REST API
 
 import requests
 import sys
-import urllib3
 
-# SSL/TLS Configuration
-INSECURE = True
-
-if INSECURE:
-    # Disable SSL warnings when using self-signed certificates
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Configuration - CHANGE THESE VALUES
-KEYCLOAK_URL = "https://keycloak.ltu-m7011e-johan.se"
-REALM = "myapp"
-ADMIN_USER = "admin"
-ADMIN_PASSWORD = "admin-change-this-password"
+# Keycloak URL, realm, admin credentials and TLS settings are shared by all
+# scripts - CHANGE THEM in kc_common.py
+from kc_common import CLIENTS_URL, SESSION, get_admin_token
 
 # Client to delete
 CLIENT_ID = "my-frontend-app"
 
 
-def get_admin_token():
-    """Get admin access token from Keycloak"""
-    print("Step 1: Authenticating as admin...")
-
-    url = f"{KEYCLOAK_URL}/realms/master/protocol/openid-connect/token"
-    data = {
-        "username": ADMIN_USER,
-        "password": ADMIN_PASSWORD,
-        "grant_type": "password",
-        "client_id": "admin-cli"
-    }
-
-    try:
-        response = requests.post(url, data=data, verify=not INSECURE)
-        response.raise_for_status()
-        print("✅ Admin token obtained\n")
-        return response.json()["access_token"]
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to get admin token: {e}")
-        print("Check your credentials and Keycloak URL.")
-        sys.exit(1)
-
-
-def delete_client(token, client_id):
+def delete_client(client_id):
     """Delete a client from Keycloak"""
     print(f"Step 2: Deleting client '{client_id}'...")
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
     # Get client UUID
-    url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/clients?clientId={client_id}"
+    url = f"{CLIENTS_URL}?clientId={client_id}"
 
     try:
-        response = requests.get(url, headers=headers, verify=not INSECURE)
+        response = SESSION.get(url)
         response.raise_for_status()
         clients = response.json()
 
@@ -73,8 +35,8 @@ def delete_client(token, client_id):
         print(f"Found client with UUID: {client_uuid}")
 
         # Delete client
-        delete_url = f"{KEYCLOAK_URL}/admin/realms/{REALM}/clients/{client_uuid}"
-        response = requests.delete(delete_url, headers=headers, verify=not INSECURE)
+        delete_url = f"{CLIENTS_URL}/{client_uuid}"
+        response = SESSION.delete(delete_url)
 
         if response.status_code == 204:
             print(f"✅ Client '{client_id}' deleted successfully\n")
@@ -95,11 +57,11 @@ def main():
     print("=" * 40)
     print()
 
-    # Get admin token
-    token = get_admin_token()
+    # Get admin token (also used by SESSION for the following calls)
+    get_admin_token()
 
     # Delete client
-    success = delete_client(token, CLIENT_ID)
+    success = delete_client(CLIENT_ID)
 
     if success:
         print("=" * 40)
@@ -7,13 +7,39 @@ This is simpler but INSECURE - use only for learning!
 For production, see example-part-5 which verifies signatures properly.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
+import orjson
 import jwt
+import itertools
+import os
+import re
+import uuid
+import threading
+import time
 from functools import wraps
+from dataclasses import dataclass
 from datetime import datetime
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.get_json)"""
+
+    # Never ask for indented output (Flask does in debug mode otherwise);
+    # orjson ignores indent anyway, this skips building the arguments
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configure CORS to allow requests from React frontend
 CORS(app, resources={
@@ -23,14 +49,179 @@ CORS(app, resources={
             "http://127.0.0.1:3000"
         ],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization"],
+        "max_age": 86400  # browsers may reuse preflight (OPTIONS) answers for a day
     }
 })
 
+# Compress JSON responses (e.g. long todo lists) with gzip/brotli for
+# clients that accept it; responses under 500 bytes are not worth it
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 500
+Compress(app)
+
+
+@dataclass(slots=True)
+class Todo:
+    """
+    One todo item
+
+    slots=True stores the fields in fixed slots instead of a per-object
+    dict (several times smaller), and orjson serializes dataclasses
+    directly, so jsonify(todo) and the cached JSON work unchanged.
+    """
+    id: int
+    text: str
+    completed: bool
+    user_id: str
+    username: str
+    created_at: str
+
+
+class TodoStore:
+    """
+    In-memory todos, indexed by ID and by user (O(1) lookup and delete)
+
+    All methods are thread-safe: gunicorn serves requests on several
+    threads, and a dict must not change while it is iterated.
+
+    Each todo is also kept as JSON bytes (serialized when it is created or
+    toggled), so a listing only joins bytes. Every change bumps a version
+    number that becomes the ETag of GET /api/todos, so a polling client
+    whose list has not changed gets 304 Not Modified - and a client
+    without the ETag gets the joined list from the previous request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)  # next(todos.ids) -> 1, 2, 3, ...
+        self.by_id = {}  # todo ID -> todo
+        self.by_user = {}  # user ID -> {todo ID -> todo}
+        self.json = {}  # todo ID -> the todo as JSON bytes
+        self.version = 0  # bumped on every change (admin view of all todos)
+        self.user_versions = {}  # user ID -> version of that user's todos
+        self.lists = {}  # user ID (None: all todos) -> (version, JSON array)
+
+    def get(self, todo_id):
+        return self.by_id.get(todo_id)
+
+    def add(self, todo):
+        with self.lock:
+            self.by_id[todo.id] = todo
+            self.by_user.setdefault(todo.user_id, {})[todo.id] = todo
+            self.json[todo.id] = orjson.dumps(todo)
+            self._changed(todo.user_id)
+
+    def toggle(self, todo):
+        with self.lock:
+            todo.completed = not todo.completed
+            if todo.id in self.by_id:  # skip if it was deleted meanwhile
+                self.json[todo.id] = orjson.dumps(todo)
+                self._changed(todo.user_id)
+
+    def delete(self, todo):
+        with self.lock:
+            if self.by_id.pop(todo.id, None) is None:
+                return  # already deleted
+            user_todos = self.by_user[todo.user_id]
+            del user_todos[todo.id]
+            if not user_todos:
+                del self.by_user[todo.user_id]
+            del self.json[todo.id]
+            self._changed(todo.user_id)
+
+    def _changed(self, user_id):
+        """Bump the versions after a change (call with the lock held)"""
+        self.version += 1
+        self.user_versions[user_id] = self.user_versions.get(user_id, 0) + 1
+
+    def etag(self, user_id=None):
+        """
+        ETag for one user's todo list, or for all todos if user_id is None
+
+        Read it before list_json(): if a todo changes in between, the list
+        is newer than its ETag, which only costs one extra full response.
+        """
+        with self.lock:
+            if user_id is None:
+                return f'{ETAG_BOOT_ID}-all-{self.version}'
+            return f'{ETAG_BOOT_ID}-{user_id}-{self.user_versions.get(user_id, 0)}'
+
+    def list_json(self, user_id=None):
+        """JSON array of one user's todos, or of all todos if user_id is None"""
+        with self.lock:
+            if user_id is None:
+                version = self.version
+            else:
+                version = self.user_versions.get(user_id, 0)
+
+            # Reuse the list built last time if nothing has changed since
+            cached = self.lists.get(user_id)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            if user_id is None:
+                fragments = self.json.values()
+            else:
+                fragments = [self.json[todo_id] for todo_id in self.by_user.get(user_id, ())]
+            body = b'[' + b','.join(fragments) + b']'
+            self.lists[user_id] = (version, body)
+            return body
+
+
 # In-memory storage for todos
 # In production, use a proper database (PostgreSQL, etc.)
-todos = []
-todo_id_counter = 1
+todos = TodoStore()
+
+# The boot ID makes sure ETags handed out before a restart never match
+ETAG_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+# created_at has one-second resolution, so the ISO string is formatted at
+# most once per second and shared by every todo created in that second.
+# The (second, string) tuple is swapped in one assignment, so threads never
+# see a second paired with another second's string.
+created_at_cache = (0, '')
+
+
+def created_at_now():
+    """Current local time as an ISO 8601 string (whole seconds)"""
+    global created_at_cache
+    second = int(time.time())
+    cached_second, timestamp = created_at_cache
+    if second != cached_second:
+        timestamp = datetime.fromtimestamp(second).isoformat()
+        created_at_cache = (second, timestamp)
+    return timestamp
+
+
+def get_realm_roles(claims):
+    """Realm roles from the token as a frozenset (fast 'in' checks)"""
+    return frozenset(claims.get('realm_access', {}).get('roles', ()))
+
+
+def token_identity(claims):
+    """
+    What the handlers need from a token, read once per token:
+    (claims, user ID, username, realm roles, is admin)
+    """
+    roles = get_realm_roles(claims)
+    username = claims.get('preferred_username', 'unknown')
+    return claims, claims.get('sub'), username, roles, 'admin' in roles
+
+
+def set_request_user(identity):
+    """Store a token_identity() tuple as attributes of the request"""
+    (request.user, request.user_id, request.username,
+     request.user_roles, request.is_admin) = identity
+
+
+# A JWT is three base64url segments separated by dots. Anything else (e.g.
+# scanner garbage) is rejected with one regex match, before any base64 or
+# JSON decoding. Keycloak tokens are a few KB; 8 KB leaves plenty of room.
+JWT_FORMAT = re.compile(r'[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*')
+MAX_TOKEN_LENGTH = 8192
 
 
 def require_auth(f):
@@ -48,12 +239,14 @@ def require_auth(f):
         if not auth_header:
             return jsonify({'error': 'No authorization header'}), 401
 
-        # Extract token (format: "Bearer <token>")
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
+        # Extract token (format: "Bearer <token>", scheme is case-insensitive)
+        # Slicing avoids building a list with split() on every request
+        if auth_header[:7].lower() != 'bearer ':
             return jsonify({'error': 'Invalid authorization header'}), 401
 
-        token = parts[1]
+        token = auth_header[7:].strip()
+        if len(token) > MAX_TOKEN_LENGTH or not JWT_FORMAT.fullmatch(token):
+            return jsonify({'error': 'Invalid token format'}), 401
 
         try:
             # ⚠️ INSECURE: Decode WITHOUT verifying signature
@@ -69,8 +262,9 @@ def require_auth(f):
                 }
             )
 
-            # Add user information to request context
-            request.user = decoded_token
+            # Add user information to request context (user ID, username
+            # and roles are read from the token once here, not per handler)
+            set_request_user(token_identity(decoded_token))
 
             return f(*args, **kwargs)
 
@@ -82,39 +276,60 @@ def require_auth(f):
 
 
 def get_user_id():
-    """Extract user ID from token"""
-    return request.user.get('sub')
+    """User ID (sub claim) of the authenticated user"""
+    return request.user_id
 
 
 def get_username():
-    """Extract username from token"""
-    return request.user.get('preferred_username', 'unknown')
+    """Username of the authenticated user"""
+    return request.username
 
 
 def is_admin():
     """Check if the authenticated user has admin role"""
-    realm_roles = request.user.get('realm_access', {}).get('roles', [])
-    return 'admin' in realm_roles
+    return request.is_admin
+
+
+def todo_list_response(body, etag):
+    """JSON todo list tagged with its ETag"""
+    response = Response(body, mimetype='application/json')
+    # Weak ETag: the same list may be sent gzip/brotli compressed or not
+    response.set_etag(etag, weak=True)
+    # private: per-user data, no-cache: revalidate (cheap 304) before reuse
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag):
+    """304 response for a client that already has the current list"""
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    return response
 
 
 # =============================================================================
 # API ENDPOINTS
 # =============================================================================
 
+# The index response never changes, so it is serialized once at startup
+INDEX_BODY = orjson.dumps({
+    'message': 'Part 4: Todo API (WITHOUT signature verification)',
+    'warning': '⚠️ This backend does NOT verify JWT signatures!',
+    'note': 'This is for learning only. See example-part-5 for secure implementation.',
+    'endpoints': {
+        'GET /api/todos': 'Get todos (requires token)',
+        'POST /api/todos': 'Create todo (requires token)',
+        'PUT /api/todos/<id>/toggle': 'Toggle todo completion (requires token)',
+        'DELETE /api/todos/<id>': 'Delete todo (requires token)'
+    }
+})
+
+
 @app.route('/')
 def index():
     """Health check endpoint"""
-    return jsonify({
-        'message': 'Part 4: Todo API (WITHOUT signature verification)',
-        'warning': '⚠️ This backend does NOT verify JWT signatures!',
-        'note': 'This is for learning only. See example-part-5 for secure implementation.',
-        'endpoints': {
-            'GET /api/todos': 'Get todos (requires token)',
-            'POST /api/todos': 'Create todo (requires token)',
-            'PUT /api/todos/<id>/toggle': 'Toggle todo completion (requires token)',
-            'DELETE /api/todos/<id>': 'Delete todo (requires token)'
-        }
-    })
+    return Response(INDEX_BODY, mimetype='application/json')
 
 
 @app.route('/api/todos', methods=['GET'])
@@ -129,19 +344,22 @@ def get_todos():
 
     if is_admin():
         # Admin sees all todos
-        return jsonify(todos)
+        etag = todos.etag()
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        return todo_list_response(todos.list_json(), etag)
     else:
         # Regular user sees only their todos
-        user_todos = [t for t in todos if t['user_id'] == user_id]
-        return jsonify(user_todos)
+        etag = todos.etag(user_id)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        return todo_list_response(todos.list_json(user_id), etag)
 
 
 @app.route('/api/todos', methods=['POST'])
 @require_auth
 def create_todo():
     """Create a new todo for the authenticated user"""
-    global todo_id_counter
-
     data = request.get_json()
 
     if not data or 'text' not in data:
@@ -154,17 +372,16 @@ def create_todo():
     user_id = get_user_id()
     username = get_username()
 
-    new_todo = {
-        'id': todo_id_counter,
-        'text': text,
-        'completed': False,
-        'user_id': user_id,
-        'username': username,
-        'created_at': datetime.now().isoformat()
-    }
+    new_todo = Todo(
+        id=next(todos.ids),
+        text=text,
+        completed=False,
+        user_id=user_id,
+        username=username,
+        created_at=created_at_now()
+    )
 
-    todos.append(new_todo)
-    todo_id_counter += 1
+    todos.add(new_todo)
 
     print(f"✓ Todo created by {username}: {text}")
 
@@ -178,17 +395,17 @@ def toggle_todo(todo_id):
     user_id = get_user_id()
 
     # Find the todo
-    todo = next((t for t in todos if t['id'] == todo_id), None)
+    todo = todos.get(todo_id)
 
     if not todo:
         return jsonify({'error': 'Todo not found'}), 404
 
     # Check permissions: owner or admin
-    if todo['user_id'] != user_id and not is_admin():
+    if todo.user_id != user_id and not is_admin():
         return jsonify({'error': 'Forbidden: You can only toggle your own todos'}), 403
 
     # Toggle completion status
-    todo['completed'] = not todo['completed']
+    todos.toggle(todo)
 
     print(f"✓ Todo {todo_id} toggled by {get_username()}")
 
@@ -199,22 +416,20 @@ def toggle_todo(todo_id):
 @require_auth
 def delete_todo(todo_id):
     """Delete a todo"""
-    global todos
-
     user_id = get_user_id()
 
     # Find the todo
-    todo = next((t for t in todos if t['id'] == todo_id), None)
+    todo = todos.get(todo_id)
 
     if not todo:
         return jsonify({'error': 'Todo not found'}), 404
 
     # Check permissions: owner or admin
-    if todo['user_id'] != user_id and not is_admin():
+    if todo.user_id != user_id and not is_admin():
         return jsonify({'error': 'Forbidden: You can only delete your own todos'}), 403
 
     # Delete the todo
-    todos = [t for t in todos if t['id'] != todo_id]
+    todos.delete(todo)
 
     print(f"✓ Todo {todo_id} deleted by {get_username()}")
 
@@ -225,14 +440,19 @@ def delete_todo(todo_id):
 # ERROR HANDLERS
 # =============================================================================
 
+# Error responses never change either
+NOT_FOUND_BODY = orjson.dumps({'error': 'Not found'})
+INTERNAL_ERROR_BODY = orjson.dumps({'error': 'Internal server error'})
+
+
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({'error': 'Not found'}), 404
+    return Response(NOT_FOUND_BODY, status=404, mimetype='application/json')
 
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
+    return Response(INTERNAL_ERROR_BODY, status=500, mimetype='application/json')
 
 
 # =============================================================================
@@ -267,4 +487,7 @@ if __name__ == '__main__':
     print("=" * 70)
     print("")
 
-    app.run(debug=True, port=5001, host='0.0.0.0')
+    # Flask's development server (start-backend.sh uses gunicorn instead).
+    # Debug mode (reloader + interactive debugger) only with FLASK_DEBUG=1
+    app.run(port=5001, host='0.0.0.0',
+            debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
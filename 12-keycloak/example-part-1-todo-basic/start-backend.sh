@@ -43,4 +43,9 @@ echo ""
 echo "=========================================="
 echo ""
 
-./venv/bin/python app.py
+# Serve with gunicorn instead of Flask's development server.
+# One worker process (-w 1) because todos are stored in memory - several
+# processes would each have their own todo list. The 8 threads serve
+# concurrent requests.
+# (To use Flask's development server instead: ./venv/bin/python app.py)
+./venv/bin/gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5001 app:app
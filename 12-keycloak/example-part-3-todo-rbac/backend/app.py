@@ -6,26 +6,66 @@ This backend properly verifies JWT signatures AND implements role-based access.
 - Regular users can only see and manage their OWN todos
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
+import orjson
 import jwt
 import requests
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from jwt.utils import base64url_decode
+from cachetools import TLRUCache
 import urllib3
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
+import time
+import itertools
+import os
+import re
+import uuid
 from functools import wraps
+from dataclasses import dataclass
 from datetime import datetime
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.get_json)"""
+
+    # Never ask for indented output (Flask does in debug mode otherwise);
+    # orjson ignores indent anyway, this skips building the arguments
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configure CORS
 CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:3000", "http://127.0.0.1:3000"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization"],
+        "max_age": 86400  # browsers may reuse preflight (OPTIONS) answers for a day
     }
 })
 
+# Compress JSON responses (e.g. long todo lists) with gzip/brotli for
+# clients that accept it; responses under 500 bytes are not worth it
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 500
+Compress(app)
+
 # SSL Configuration
 INSECURE = True
 if INSECURE:
@@ -35,112 +75,545 @@ if INSECURE:
 KEYCLOAK_URL = "https://keycloak.ltu-m7011e-johan.se"
 REALM = "myapp"
 CERTS_URL = f"{KEYCLOAK_URL}/realms/{REALM}/protocol/openid-connect/certs"
-
-# Cache for public keys
+TOKEN_AUDIENCE = 'account'  # Keycloak access tokens are issued for 'account'
+
+# One HTTP session for all calls to Keycloak: the TCP/TLS connection is
+# reused instead of doing a new handshake each time, and failed
+# connections are retried twice with a short backoff
+keycloak_session = requests.Session()
+keycloak_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+keycloak_session.verify = not INSECURE
+
+# Cache for public keys (the JWKS document from Keycloak)
+# Keys are refreshed when Keycloak's Cache-Control max-age runs out, or
+# early when a token is signed with a key we don't know (key rotation)
+JWKS_DEFAULT_MAX_AGE = 3600      # seconds, if Keycloak sends no max-age
+JWKS_MIN_REFRESH_INTERVAL = 30   # seconds between fetch attempts
 public_keys = None
+public_keys_fetched_at = 0
+public_keys_max_age = JWKS_DEFAULT_MAX_AGE
+jwks_last_attempt = 0
+
+# Parsed RSA public keys by key ID (kid), converted once per JWKS fetch so
+# verifying a token only needs a dict lookup
+signing_keys = {}
+
+# Guards the key caches above
+keys_lock = threading.RLock()
+
+# Already verified tokens (raw token -> token_identity()): a token that is
+# sent again is not verified again. An entry expires after 60 seconds, or
+# earlier when the token itself expires (its exp claim), so expired tokens
+# never hit.
+VERIFIED_TOKEN_TTL = 60
+
+
+def verified_token_expiry(token, identity, now):
+    """When a cache entry expires: the token's exp, at most 60 s from now"""
+    claims = identity[0]
+    return min(claims['exp'], now + VERIFIED_TOKEN_TTL)
+
+
+verified_tokens = TLRUCache(maxsize=10_000, ttu=verified_token_expiry, timer=time.time)
+verified_tokens_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class Todo:
+    """
+    One todo item
+
+    slots=True stores the fields in fixed slots instead of a per-object
+    dict (several times smaller), and orjson serializes dataclasses
+    directly, so jsonify(todo) and the cached JSON work unchanged.
+    """
+    id: int
+    text: str
+    completed: bool
+    user_id: str
+    username: str
+    created_at: str
+
+
+class TodoStore:
+    """
+    In-memory todos, indexed by ID and by user (O(1) lookup and delete)
+
+    All methods are thread-safe: gunicorn serves requests on several
+    threads, and a dict must not change while it is iterated.
+
+    Each todo is also kept as JSON bytes (serialized when it is created or
+    toggled), so a listing only joins bytes. Every change bumps a version
+    number that becomes the ETag of GET /api/todos, so a polling client
+    whose list has not changed gets 304 Not Modified - and a client
+    without the ETag gets the joined list from the previous request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)  # next(todos.ids) -> 1, 2, 3, ...
+        self.by_id = {}  # todo ID -> todo
+        self.by_user = {}  # user ID -> {todo ID -> todo}
+        self.json = {}  # todo ID -> the todo as JSON bytes
+        self.version = 0  # bumped on every change (admin view of all todos)
+        self.user_versions = {}  # user ID -> version of that user's todos
+        self.lists = {}  # user ID (None: all todos) -> (version, JSON array)
+
+    def get(self, todo_id):
+        return self.by_id.get(todo_id)
+
+    def add(self, todo):
+        with self.lock:
+            self.by_id[todo.id] = todo
+            self.by_user.setdefault(todo.user_id, {})[todo.id] = todo
+            self.json[todo.id] = orjson.dumps(todo)
+            self._changed(todo.user_id)
+
+    def toggle(self, todo):
+        with self.lock:
+            todo.completed = not todo.completed
+            if todo.id in self.by_id:  # skip if it was deleted meanwhile
+                self.json[todo.id] = orjson.dumps(todo)
+                self._changed(todo.user_id)
+
+    def delete(self, todo):
+        with self.lock:
+            if self.by_id.pop(todo.id, None) is None:
+                return  # already deleted
+            user_todos = self.by_user[todo.user_id]
+            del user_todos[todo.id]
+            if not user_todos:
+                del self.by_user[todo.user_id]
+            del self.json[todo.id]
+            self._changed(todo.user_id)
+
+    def _changed(self, user_id):
+        """Bump the versions after a change (call with the lock held)"""
+        self.version += 1
+        self.user_versions[user_id] = self.user_versions.get(user_id, 0) + 1
+
+    def etag(self, user_id=None):
+        """
+        ETag for one user's todo list, or for all todos if user_id is None
+
+        Read it before list_json(): if a todo changes in between, the list
+        is newer than its ETag, which only costs one extra full response.
+        """
+        with self.lock:
+            if user_id is None:
+                return f'{ETAG_BOOT_ID}-all-{self.version}'
+            return f'{ETAG_BOOT_ID}-{user_id}-{self.user_versions.get(user_id, 0)}'
+
+    def list_json(self, user_id=None):
+        """JSON array of one user's todos, or of all todos if user_id is None"""
+        with self.lock:
+            if user_id is None:
+                version = self.version
+            else:
+                version = self.user_versions.get(user_id, 0)
+
+            # Reuse the list built last time if nothing has changed since
+            cached = self.lists.get(user_id)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            if user_id is None:
+                fragments = self.json.values()
+            else:
+                fragments = [self.json[todo_id] for todo_id in self.by_user.get(user_id, ())]
+            body = b'[' + b','.join(fragments) + b']'
+            self.lists[user_id] = (version, body)
+            return body
+
 
 # In-memory storage
-todos = []
-todo_id_counter = 1
+todos = TodoStore()
+
+# The boot ID makes sure ETags handed out before a restart never match
+ETAG_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+# created_at has one-second resolution, so the ISO string is formatted at
+# most once per second and shared by every todo created in that second.
+# The (second, string) tuple is swapped in one assignment, so threads never
+# see a second paired with another second's string.
+created_at_cache = (0, '')
+
+
+def created_at_now():
+    """Current local time as an ISO 8601 string (whole seconds)"""
+    global created_at_cache
+    second = int(time.time())
+    cached_second, timestamp = created_at_cache
+    if second != cached_second:
+        timestamp = datetime.fromtimestamp(second).isoformat()
+        created_at_cache = (second, timestamp)
+    return timestamp
+
+
+def cache_max_age(response):
+    """Read max-age from the Cache-Control header (default if missing)"""
+    for directive in response.headers.get('Cache-Control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name.lower() == 'max-age' and value.isdigit():
+            return int(value)
+    return JWKS_DEFAULT_MAX_AGE
+
+
+def get_jwks(force_refresh=False):
+    """
+    Fetch public keys from Keycloak (cached until they expire)
+
+    force_refresh fetches them again before they expire, but Keycloak is
+    contacted at most once every JWKS_MIN_REFRESH_INTERVAL seconds. If it
+    can't be reached, the keys we already have keep being used.
+    """
+    global public_keys, public_keys_fetched_at, public_keys_max_age, jwks_last_attempt
+    global signing_keys
+
+    with keys_lock:
+        now = time.time()
+        if public_keys is not None:
+            fresh = now - public_keys_fetched_at < public_keys_max_age
+            recently_tried = now - jwks_last_attempt < JWKS_MIN_REFRESH_INTERVAL
+            if (fresh and not force_refresh) or recently_tried:
+                return public_keys
+
+        jwks_last_attempt = now
+        try:
+            response = keycloak_session.get(CERTS_URL, timeout=5)
+            response.raise_for_status()
+            jwks = orjson.loads(response.content)
+            keys = parse_signing_keys(jwks)
+        except (requests.exceptions.RequestException, ValueError, KeyError, jwt.InvalidKeyError) as e:
+            if public_keys is None:
+                raise
+            print(f"WARNING: Could not refresh public keys, using cached keys: {e}")
+            return public_keys
+
+        public_keys = jwks
+        # Swap in a new dict: keys that Keycloak no longer publishes are gone
+        signing_keys = keys
+        public_keys_fetched_at = now
+        public_keys_max_age = cache_max_age(response)
+        return public_keys
+
+
+def parse_signing_keys(jwks):
+    """Convert the RSA signing keys of a JWKS to public key objects by kid"""
+    return {
+        # from_jwk accepts the JWK dict directly (no json.dumps needed)
+        key['kid']: jwt.algorithms.RSAAlgorithm.from_jwk(key)
+        for key in jwks['keys']
+        if key.get('kty') == 'RSA' and key.get('use', 'sig') == 'sig'
+    }
+
+
+def get_signing_key(kid):
+    """Return the parsed public key with the given kid (None if unknown)"""
+    # Fast path: key already parsed and the JWKS has not expired
+    rsa_key = signing_keys.get(kid)
+    if rsa_key is not None and time.time() - public_keys_fetched_at < public_keys_max_age:
+        return rsa_key
+
+    with keys_lock:
+        get_jwks()
+        rsa_key = signing_keys.get(kid)
+        if rsa_key is None:
+            # Unknown kid - Keycloak may have rotated its keys
+            get_jwks(force_refresh=True)
+            rsa_key = signing_keys.get(kid)
+        return rsa_key
+
+
+def refresh_jwks_forever():
+    """
+    Background thread: re-fetch the JWKS at half its max-age
+
+    This keeps the keys fresh, so a user request never has to wait for
+    Keycloak. The on-request refresh in get_signing_key stays as a
+    fallback for key rotation and for the very first request.
+    """
+    while True:
+        try:
+            get_jwks(force_refresh=True)
+        except Exception as e:
+            print(f"WARNING: Background refresh of public keys failed: {e}")
+        time.sleep(max(public_keys_max_age / 2, JWKS_MIN_REFRESH_INTERVAL))
+
+
+# Daemon thread: it stops automatically when the server exits
+threading.Thread(target=refresh_jwks_forever, name='jwks-refresher', daemon=True).start()
+
+
+def get_realm_roles(claims):
+    """Realm roles from the token as a frozenset (fast 'in' checks)"""
+    return frozenset(claims.get('realm_access', {}).get('roles', ()))
+
+
+def token_identity(claims):
+    """
+    What the handlers need from a token, read once per token:
+    (claims, user ID, username, realm roles, is admin)
+    """
+    roles = get_realm_roles(claims)
+    username = claims.get('preferred_username', 'unknown')
+    return claims, claims.get('sub'), username, roles, 'admin' in roles
+
+
+def set_request_user(identity):
+    """Store a token_identity() tuple as attributes of the request"""
+    (request.user, request.user_id, request.username,
+     request.user_roles, request.is_admin) = identity
+
+
+def split_token(token):
+    """
+    Split a JWT into (header, claims, signed part, signature)
+
+    Nothing is verified here - see verify_token.
+    """
+    try:
+        header_b64, claims_b64, signature_b64 = token.split('.')
+        header = orjson.loads(base64url_decode(header_b64))
+        claims = orjson.loads(base64url_decode(claims_b64))
+        signature = base64url_decode(signature_b64)
+    except ValueError as e:
+        raise jwt.DecodeError(f'Malformed token: {e}')
+
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise jwt.DecodeError('Malformed token')
+
+    return header, claims, f'{header_b64}.{claims_b64}'.encode(), signature
 
 
-def get_public_keys():
-    """Fetch public keys from Keycloak"""
-    global public_keys
-    if not public_keys:
-        response = requests.get(CERTS_URL, verify=not INSECURE)
-        public_keys = response.json()
-    return public_keys
+def verify_token(rsa_key, claims, signed_part, signature):
+    """
+    Check an RS256 signature and the exp, iat, nbf and aud claims
+
+    Does the same checks as jwt.decode(..., algorithms=['RS256'],
+    audience=TOKEN_AUDIENCE) and raises the same PyJWT exceptions, but
+    verifies directly with the already parsed key (the RSA math runs in
+    OpenSSL through the cryptography package). Like
+    options={'require': ['exp', 'iat']}, tokens without exp or iat fail.
+    """
+    try:
+        rsa_key.verify(signature, signed_part, padding.PKCS1v15(), hashes.SHA256())
+    except InvalidSignature:
+        raise jwt.InvalidSignatureError('Signature verification failed')
+
+    now = time.time()
+
+    # exp and iat are required, nbf is optional. A time claim that is
+    # present but not a number makes the whole token invalid.
+    exp = claims.get('exp')
+    if exp is None:
+        raise jwt.MissingRequiredClaimError('exp')
+    if not isinstance(exp, (int, float)):
+        raise jwt.DecodeError('Expiration Time claim (exp) must be a number.')
+    if exp <= now:
+        raise jwt.ExpiredSignatureError('Signature has expired')
+
+    iat = claims.get('iat')
+    if iat is None:
+        raise jwt.MissingRequiredClaimError('iat')
+    if not isinstance(iat, (int, float)):
+        raise jwt.DecodeError('Issued At claim (iat) must be a number.')
+    if iat > now:
+        raise jwt.ImmatureSignatureError('The token is not yet valid (iat)')
+
+    nbf = claims.get('nbf')
+    if nbf is not None:
+        if not isinstance(nbf, (int, float)):
+            raise jwt.DecodeError('Not Before claim (nbf) must be a number.')
+        if nbf > now:
+            raise jwt.ImmatureSignatureError('The token is not yet valid (nbf)')
+
+    audience = claims.get('aud')
+    if audience is None:
+        raise jwt.MissingRequiredClaimError('aud')
+    if isinstance(audience, str):
+        audience = [audience]
+    if not isinstance(audience, list) or TOKEN_AUDIENCE not in audience:
+        raise jwt.InvalidAudienceError("Audience doesn't match")
+
+
+# A JWT is three base64url segments separated by dots. Anything else (e.g.
+# scanner garbage) is rejected with one regex match, before any base64 or
+# JSON decoding. Keycloak tokens are a few KB; 8 KB leaves plenty of room.
+JWT_FORMAT = re.compile(r'[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*')
+MAX_TOKEN_LENGTH = 8192
+
+
+def authenticate():
+    """
+    Verify the bearer token and set request.user, user_id, username,
+    user_roles and is_admin
+
+    Returns an error response, or None if the token is valid.
+    """
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return jsonify({'error': 'No authorization header'}), 401
+
+    # Extract token (format: "Bearer <token>", scheme is case-insensitive)
+    # Slicing avoids building a list with split() on every request
+    if auth_header[:7].lower() != 'bearer ':
+        return jsonify({'error': 'Invalid authorization header'}), 401
+
+    token = auth_header[7:].strip()
+    if len(token) > MAX_TOKEN_LENGTH or not JWT_FORMAT.fullmatch(token):
+        return jsonify({'error': 'Invalid token format'}), 401
+
+    # Fast path: this exact token was verified recently
+    with verified_tokens_lock:
+        cached = verified_tokens.get(token)
+    if cached is not None:
+        set_request_user(cached)
+        return None
+
+    try:
+        # ✅ SECURE: Verify signature using Keycloak public keys
+        header, decoded_token, signed_part, signature = split_token(token)
+        if header.get('alg') != 'RS256':
+            raise jwt.InvalidAlgorithmError('The specified alg value is not allowed')
+
+        rsa_key = get_signing_key(header.get('kid'))
+        if not rsa_key:
+            return jsonify({'error': 'Public key not found'}), 401
+
+        # Verify signature and validate claims (exp, nbf, aud)
+        verify_token(rsa_key, decoded_token, signed_part, signature)
+
+    except jwt.ExpiredSignatureError:
+        return jsonify({'error': 'Token has expired'}), 401
+    except jwt.InvalidTokenError as e:
+        return jsonify({'error': f'Invalid token: {str(e)}'}), 401
+
+    # User ID, username and roles are read from the token once here,
+    # not in every handler or role check
+    identity = token_identity(decoded_token)
+    with verified_tokens_lock:
+        verified_tokens[token] = identity
+
+    set_request_user(identity)
+    return None
 
 
 def require_auth(f):
     """Decorator WITH signature verification"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({'error': 'No authorization header'}), 401
+        error = authenticate()
+        if error:
+            return error
+        return f(*args, **kwargs)
 
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
-            return jsonify({'error': 'Invalid authorization header'}), 401
+    return decorated_function
 
-        token = parts[1]
 
-        try:
-            # ✅ SECURE: Verify signature using Keycloak public keys
-            keys = get_public_keys()
-            unverified_header = jwt.get_unverified_header(token)
-
-            rsa_key = None
-            for key in keys['keys']:
-                if key['kid'] == unverified_header['kid']:
-                    rsa_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
-
-            if not rsa_key:
-                return jsonify({'error': 'Public key not found'}), 401
-
-            # Verify signature and validate claims
-            decoded_token = jwt.decode(
-                token,
-                rsa_key,
-                algorithms=['RS256'],
-                audience='account',
-                options={
-                    'verify_signature': True,  # ✅ Verify signature!
-                    'verify_exp': True,
-                    'verify_nbf': True,
-                    'verify_iss': True,
-                    'verify_aud': True
-                }
-            )
-
-            request.user = decoded_token
+def require_roles(*roles, mode='any'):
+    """
+    Decorator that requires a valid token AND some roles
+
+    mode='any': the user needs at least one of the roles
+    mode='all': the user needs all of them
+
+    Usage:
+        @app.route('/api/admin/...')
+        @require_roles('admin')
+        def admin_only(): ...
+
+    Authentication and the role check run in one wrapper, so there is no
+    need to stack @require_auth on top.
+    """
+    required = frozenset(roles)
+    if mode not in ('any', 'all'):
+        raise ValueError("mode must be 'any' or 'all'")
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            error = authenticate()
+            if error:
+                return error
+
+            if mode == 'all':
+                allowed = required <= request.user_roles
+            else:
+                allowed = not required.isdisjoint(request.user_roles)
+            if not allowed:
+                return jsonify({'error': f'Forbidden: requires role {", ".join(sorted(required))}'}), 403
+
             return f(*args, **kwargs)
 
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
-        except jwt.InvalidTokenError as e:
-            return jsonify({'error': f'Invalid token: {str(e)}'}), 401
+        return decorated_function
 
-    return decorated_function
+    return decorator
 
 
 def get_user_id():
-    return request.user.get('sub')
+    """User ID (sub claim) of the authenticated user"""
+    return request.user_id
 
 
 def get_username():
-    return request.user.get('preferred_username', 'unknown')
+    """Username of the authenticated user"""
+    return request.username
 
 
 def is_admin():
     """Check if the authenticated user has admin role"""
-    realm_roles = request.user.get('realm_access', {}).get('roles', [])
-    return 'admin' in realm_roles
+    return request.is_admin
+
+
+def todo_list_response(body, etag):
+    """JSON todo list tagged with its ETag"""
+    response = Response(body, mimetype='application/json')
+    # Weak ETag: the same list may be sent gzip/brotli compressed or not
+    response.set_etag(etag, weak=True)
+    # private: per-user data, no-cache: revalidate (cheap 304) before reuse
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag):
+    """304 response for a client that already has the current list"""
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    return response
 
 
 # =============================================================================
 # API ENDPOINTS WITH RBAC
 # =============================================================================
 
+# The index response never changes, so it is serialized once at startup
+INDEX_BODY = orjson.dumps({
+    'message': 'Part 3: Todo API WITH RBAC',
+    'security': '✅ JWT signatures are verified',
+    'rbac': '✅ Role-based access control enabled',
+    'roles': {
+        'admin': 'Can view and manage ALL todos',
+        'user': 'Can only view and manage OWN todos'
+    },
+    'endpoints': {
+        'GET /api/todos': 'Get todos (all for admin, own for users)',
+        'POST /api/todos': 'Create todo',
+        'PUT /api/todos/<id>/toggle': 'Toggle todo (own only, or admin)',
+        'DELETE /api/todos/<id>': 'Delete todo (own only, or admin)'
+    }
+})
+
+
 @app.route('/')
 def index():
-    return jsonify({
-        'message': 'Part 3: Todo API WITH RBAC',
-        'security': '✅ JWT signatures are verified',
-        'rbac': '✅ Role-based access control enabled',
-        'roles': {
-            'admin': 'Can view and manage ALL todos',
-            'user': 'Can only view and manage OWN todos'
-        },
-        'endpoints': {
-            'GET /api/todos': 'Get todos (all for admin, own for users)',
-            'POST /api/todos': 'Create todo',
-            'PUT /api/todos/<id>/toggle': 'Toggle todo (own only, or admin)',
-            'DELETE /api/todos/<id>': 'Delete todo (own only, or admin)'
-        }
-    })
+    return Response(INDEX_BODY, mimetype='application/json')
 
 
 @app.route('/api/todos', methods=['GET'])
@@ -149,20 +622,23 @@ def get_todos():
     """Get todos - admin sees ALL, users see only their own"""
     if is_admin():
         # Admin can see all todos
-        return jsonify(todos)
+        etag = todos.etag()
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        return todo_list_response(todos.list_json(), etag)
     else:
         # Regular users see only their own todos
         user_id = get_user_id()
-        user_todos = [t for t in todos if t['user_id'] == user_id]
-        return jsonify(user_todos)
+        etag = todos.etag(user_id)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        return todo_list_response(todos.list_json(user_id), etag)
 
 
 @app.route('/api/todos', methods=['POST'])
 @require_auth
 def create_todo():
     """Create a new todo"""
-    global todo_id_counter
-
     data = request.get_json()
     if not data or 'text' not in data:
         return jsonify({'error': 'Missing required field: text'}), 400
@@ -171,17 +647,16 @@ def create_todo():
     if not text:
         return jsonify({'error': 'Todo text cannot be empty'}), 400
 
-    new_todo = {
-        'id': todo_id_counter,
-        'text': text,
-        'completed': False,
-        'user_id': get_user_id(),
-        'username': get_username(),
-        'created_at': datetime.now().isoformat()
-    }
+    new_todo = Todo(
+        id=next(todos.ids),
+        text=text,
+        completed=False,
+        user_id=get_user_id(),
+        username=get_username(),
+        created_at=created_at_now()
+    )
 
-    todos.append(new_todo)
-    todo_id_counter += 1
+    todos.add(new_todo)
 
     return jsonify(new_todo), 201
 
@@ -192,15 +667,15 @@ def toggle_todo(todo_id):
     """Toggle todo completion - own todos only, or admin can toggle any"""
     user_id = get_user_id()
 
-    todo = next((t for t in todos if t['id'] == todo_id), None)
+    todo = todos.get(todo_id)
     if not todo:
         return jsonify({'error': 'Todo not found'}), 404
 
     # Admin can toggle any todo, regular users can only toggle their own
-    if not is_admin() and todo['user_id'] != user_id:
+    if not is_admin() and todo.user_id != user_id:
         return jsonify({'error': 'Forbidden: You can only toggle your own todos'}), 403
 
-    todo['completed'] = not todo['completed']
+    todos.toggle(todo)
     return jsonify(todo)
 
 
@@ -208,18 +683,17 @@ def toggle_todo(todo_id):
 @require_auth
 def delete_todo(todo_id):
     """Delete todo - own todos only, or admin can delete any"""
-    global todos
     user_id = get_user_id()
 
-    todo = next((t for t in todos if t['id'] == todo_id), None)
+    todo = todos.get(todo_id)
     if not todo:
         return jsonify({'error': 'Todo not found'}), 404
 
     # Admin can delete any todo, regular users can only delete their own
-    if not is_admin() and todo['user_id'] != user_id:
+    if not is_admin() and todo.user_id != user_id:
         return jsonify({'error': 'Forbidden: You can only delete your own todos'}), 403
 
-    todos = [t for t in todos if t['id'] != todo_id]
+    todos.delete(todo)
     return '', 204
 
 
@@ -240,10 +714,13 @@ if __name__ == '__main__':
     print("")
 
     try:
-        get_public_keys()
+        get_jwks()
         print("✓ Successfully fetched Keycloak public keys")
     except Exception as e:
         print(f"WARNING: Could not fetch public keys: {e}")
     print("")
 
-    app.run(debug=True, port=5001, host='0.0.0.0')
+    # Flask's development server (start-backend.sh uses gunicorn instead).
+    # Debug mode (reloader + interactive debugger) only with FLASK_DEBUG=1
+    app.run(port=5001, host='0.0.0.0',
+            debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
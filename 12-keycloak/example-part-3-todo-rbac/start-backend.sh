@@ -30,4 +30,10 @@ echo "Starting Flask server..."
 echo "Backend will be available at: http://localhost:5001"
 echo ""
 
-./venv/bin/python app.py
+# Serve with gunicorn instead of Flask's development server.
+# One worker process (-w 1) because todos are stored in memory - several
+# processes would each have their own todo list. The 8 threads serve
+# concurrent requests, so one request waiting on a public key fetch from
+# Keycloak doesn't hold up role checks for the other users.
+# (To use Flask's development server instead: ./venv/bin/python app.py)
+./venv/bin/gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5001 app:app
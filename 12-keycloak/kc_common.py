@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Keycloak admin scripts
+
+Holds the Keycloak connection settings used by create-realm.py,
+create-client.py, create-user.py and delete-client.py, and caches the
+admin access token on disk so running several scripts in a row only
+authenticates once.
+"""
+
+import base64
+import json
+import os
+import sys
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+# SSL/TLS Configuration
+# Use INSECURE=True for staging/self-signed certificates
+# Use INSECURE=False for production Let's Encrypt certificates
+INSECURE = True
+
+if INSECURE:
+    # Disable SSL warnings when using self-signed certificates
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Configuration - CHANGE THESE VALUES
+KEYCLOAK_URL = "https://keycloak.ltu-m7011e-johan.se"
+REALM = "myapp"
+ADMIN_USER = "admin"
+ADMIN_PASSWORD = "admin-change-this-password"
+
+# Admin REST API endpoints (built once from the settings above)
+TOKEN_URL = f"{KEYCLOAK_URL}/realms/master/protocol/openid-connect/token"
+REALMS_URL = f"{KEYCLOAK_URL}/admin/realms"
+CLIENTS_URL = f"{REALMS_URL}/{REALM}/clients"
+USERS_URL = f"{REALMS_URL}/{REALM}/users"
+
+# One HTTP session for all Keycloak calls: the TCP/TLS connection is kept
+# alive and reused instead of doing a new handshake for every request
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+SESSION.verify = not INSECURE
+# Request bodies are JSON serialized with orjson (sent with data=...)
+SESSION.headers["Content-Type"] = "application/json"
+
+# Admin token cache (shared by all scripts)
+TOKEN_CACHE_FILE = os.path.expanduser("~/.cache/kc-admin-token.json")
+TOKEN_EXPIRY_MARGIN = 30  # seconds - refresh tokens that are about to expire
+
+
+def _token_expiry(token):
+    """Return the 'exp' claim of a JWT without verifying it (we issued the request)"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)  # restore base64 padding
+        return json.loads(base64.urlsafe_b64decode(payload))["exp"]
+    except (IndexError, KeyError, ValueError):
+        return 0
+
+
+def _cache_key():
+    """Tokens are only valid for the Keycloak server and user they were issued for"""
+    return f"{KEYCLOAK_URL}|{ADMIN_USER}"
+
+
+def _load_cached_token():
+    """Return the cached admin token if it is still valid, otherwise None"""
+    try:
+        with open(TOKEN_CACHE_FILE) as f:
+            token = json.load(f).get(_cache_key())
+    except (OSError, ValueError):
+        return None
+
+    if token and _token_expiry(token) > time.time() + TOKEN_EXPIRY_MARGIN:
+        return token
+    return None
+
+
+def _save_cached_token(token):
+    """Write the admin token to the cache file, readable only by the current user"""
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE_FILE), exist_ok=True)
+        try:
+            with open(TOKEN_CACHE_FILE) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        cache[_cache_key()] = token
+
+        fd = os.open(TOKEN_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f)
+        os.chmod(TOKEN_CACHE_FILE, 0o600)
+    except OSError as e:
+        # Caching is only an optimization - the script still works without it
+        print(f"⚠️  Could not cache admin token: {e}")
+
+
+def _use_token(token):
+    """Send the admin token with every following request made through SESSION"""
+    SESSION.headers["Authorization"] = f"Bearer {token}"
+    return token
+
+
+def get_admin_token():
+    """
+    Get admin access token from Keycloak (reusing a cached one when possible)
+
+    The token is also set as the default Authorization header of SESSION.
+    """
+    print("Step 1: Authenticating as admin...")
+
+    token = _load_cached_token()
+    if token:
+        print("✅ Using cached admin token\n")
+        return _use_token(token)
+
+    data = {
+        "username": ADMIN_USER,
+        "password": ADMIN_PASSWORD,
+        "grant_type": "password",
+        "client_id": "admin-cli"
+    }
+
+    try:
+        # The token endpoint expects a form, not the session's default JSON
+        response = SESSION.post(
+            TOKEN_URL, data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        response.raise_for_status()
+        token = response.json()["access_token"]
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Failed to get admin token: {e}")
+        print("Check your credentials and Keycloak URL.")
+        sys.exit(1)
+
+    _save_cached_token(token)
+    print("✅ Admin token obtained\n")
+    return _use_token(token)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Keycloak Provisioning Script
+Creates the realm, the client and the test user in one run
+
+The realm has to exist before anything can be created in it, but the client
+and the user don't depend on each other, so they are created concurrently.
+Uses the settings from kc_common.py and the top of create-client.py and
+create-user.py.
+"""
+
+import importlib
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from kc_common import KEYCLOAK_URL, REALM, get_admin_token
+
+# The scripts have dashes in their names, so they can't be imported with a
+# plain import statement
+create_realm_script = importlib.import_module("create-realm")
+create_client_script = importlib.import_module("create-client")
+create_user_script = importlib.import_module("create-user")
+
+
+def main():
+    print("=" * 40)
+    print("Keycloak Provisioning Script")
+    print("=" * 40)
+    print()
+
+    # Get admin token once (shared by all calls through SESSION)
+    get_admin_token()
+
+    # The realm must exist before clients and users can be created in it
+    create_realm_script.create_realm(REALM)
+
+    # Client and user creation are independent - run them at the same time
+    print("Creating client and user concurrently...\n")
+    failed = False
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            executor.submit(
+                create_client_script.create_client,
+                create_client_script.CLIENT_ID,
+                create_client_script.CLIENT_NAME,
+                create_client_script.CLIENT_TYPE,
+                create_client_script.ROOT_URL
+            ): "client",
+            executor.submit(
+                create_user_script.create_user,
+                username=create_user_script.USERNAME,
+                email=create_user_script.EMAIL,
+                first_name=create_user_script.FIRST_NAME,
+                last_name=create_user_script.LAST_NAME,
+                password=create_user_script.PASSWORD
+            ): "user",
+        }
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except SystemExit as e:
+                # The creation functions exit on errors (and with code 0 if a
+                # user already exists) since they are also used as scripts
+                if e.code:
+                    print(f"❌ Creating the {futures[future]} failed")
+                    failed = True
+            except Exception as e:
+                print(f"❌ Creating the {futures[future]} failed: {e}")
+                failed = True
+
+    if failed:
+        sys.exit(1)
+
+    print("=" * 40)
+    print("✅ Provisioning complete!")
+    print("=" * 40)
+    print()
+    print(f"Realm: {REALM}")
+    print(f"Client ID: {create_client_script.CLIENT_ID}")
+    print(f"Username: {create_user_script.USERNAME}")
+    print(f"Password: {create_user_script.PASSWORD}")
+    print()
+    print("Test login at:")
+    print(f"  {KEYCLOAK_URL}/realms/{REALM}/account")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ Usage:
     python producer_simple.py
 """
 import pika
-import json
+import orjson
 import sys
 
 # Connect to RabbitMQ
@@ -36,6 +36,18 @@ except Exception as e:
 queue_name = 'test_queue'
 channel.queue_declare(queue=queue_name, durable=True)
 
+# Publisher confirms: RabbitMQ acknowledges every message once it has
+# safely stored it, and basic_publish raises NackError if it was rejected.
+# Without this a message could be lost without the producer noticing.
+channel.confirm_delivery()
+
+# Every message gets the same properties: persistent, and labelled as JSON
+# so consumers know how to decode the body
+PROPERTIES = pika.BasicProperties(
+    delivery_mode=2,  # Make message persistent
+    content_type='application/json'
+)
+
 # Send 5 messages
 print(f"[Producer] Sending 5 messages to queue '{queue_name}'...\n")
 for i in range(1, 6):
@@ -45,15 +57,17 @@ for i in range(1, 6):
         "data": f"Some data for task {i}"
     }
 
-    channel.basic_publish(
-        exchange='',
-        routing_key=queue_name,
-        body=json.dumps(message),
-        properties=pika.BasicProperties(
-            delivery_mode=2,  # Make message persistent
+    try:
+        channel.basic_publish(
+            exchange='',
+            routing_key=queue_name,
+            body=orjson.dumps(message),  # bytes, sent as they are
+            properties=PROPERTIES
         )
-    )
-    print(f"[Producer] ✓ Sent message #{i}: {message['task']}")
+    except pika.exceptions.NackError:
+        print(f"[Producer] ✗ RabbitMQ rejected message #{i}")
+        continue
+    print(f"[Producer] ✓ Sent message #{i}: {message['task']} (confirmed)")
 
 connection.close()
 print(f"\n[Producer] Done! Sent 5 messages to queue '{queue_name}'")
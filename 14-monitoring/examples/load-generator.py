@@ -9,9 +9,11 @@ Usage:
     python load-generator.py
 """
 
-import requests
+import aiohttp
+import asyncio
+import itertools
 import pika
-import json
+import orjson
 import time
 import random
 import os
@@ -21,45 +23,66 @@ from threading import Thread
 # Can be overridden with environment variables:
 # - ORDER_SERVICE_URL: URL to order service (default: http://localhost:8001)
 # - RABBITMQ_HOST: RabbitMQ host (default: localhost)
+# - HTTP_CLIENTS: number of simulated users sending HTTP requests (default: 20)
 ORDER_SERVICE_URL = os.getenv('ORDER_SERVICE_URL', 'http://localhost:8001')
 RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
-
-def generate_http_traffic():
-    """Generate HTTP requests to Order Service"""
-    print("[Load Generator] Starting HTTP traffic generation...")
-
-    while True:
+HTTP_CLIENTS = int(os.getenv('HTTP_CLIENTS', '20'))
+
+async def get_orders(session):
+    """GET /api/orders (most common)"""
+    async with session.get(f"{ORDER_SERVICE_URL}/api/orders") as response:
+        await response.read()
+    print(f"[HTTP] GET /api/orders -> {response.status}")
+
+async def create_order(session):
+    """POST /api/orders (create order)"""
+    order_data = {
+        'user_id': random.randint(100, 999),
+        'items': ['item1', 'item2'],
+        'total': random.uniform(50, 500)
+    }
+    async with session.post(f"{ORDER_SERVICE_URL}/api/orders", json=order_data) as response:
+        await response.read()
+    print(f"[HTTP] POST /api/orders -> {response.status}")
+
+async def get_order(session):
+    """GET /api/orders/:id"""
+    order_id = random.randint(1, 100)
+    async with session.get(f"{ORDER_SERVICE_URL}/api/orders/{order_id}") as response:
+        await response.read()
+    print(f"[HTTP] GET /api/orders/{order_id} -> {response.status}")
+
+# Request mix: 60% GET /api/orders, 30% POST, 10% GET by id. The sequence is
+# drawn once up front; each client just walks through it (a table lookup per
+# request instead of random numbers and if/elif branches).
+REQUEST_MIX = random.choices([get_orders, create_order, get_order],
+                             weights=[60, 30, 10], k=10_000)
+
+async def http_client(session):
+    """One simulated user: send a request, wait a bit, repeat"""
+    # Start at a random point so the clients don't all send the same sequence
+    start = random.randrange(len(REQUEST_MIX))
+    for send_request in itertools.cycle(REQUEST_MIX[start:] + REQUEST_MIX[:start]):
         try:
-            # GET /api/orders (most common)
-            if random.random() < 0.6:
-                response = requests.get(f"{ORDER_SERVICE_URL}/api/orders")
-                print(f"[HTTP] GET /api/orders -> {response.status_code}")
-
-            # POST /api/orders (create order)
-            elif random.random() < 0.3:
-                order_data = {
-                    'user_id': random.randint(100, 999),
-                    'items': ['item1', 'item2'],
-                    'total': random.uniform(50, 500)
-                }
-                response = requests.post(
-                    f"{ORDER_SERVICE_URL}/api/orders",
-                    json=order_data
-                )
-                print(f"[HTTP] POST /api/orders -> {response.status_code}")
-
-            # GET /api/orders/:id
-            else:
-                order_id = random.randint(1, 100)
-                response = requests.get(f"{ORDER_SERVICE_URL}/api/orders/{order_id}")
-                print(f"[HTTP] GET /api/orders/{order_id} -> {response.status_code}")
+            await send_request(session)
 
-            # Random delay between requests
-            time.sleep(random.uniform(0.1, 2.0))
+            # Random delay between requests (other clients keep sending meanwhile)
+            await asyncio.sleep(random.uniform(0.1, 2.0))
 
         except Exception as e:
             print(f"[HTTP] Error: {e}")
-            time.sleep(5)
+            await asyncio.sleep(5)
+
+async def generate_http_traffic():
+    """Generate HTTP requests to Order Service from several concurrent clients"""
+    print(f"[Load Generator] Starting HTTP traffic generation ({HTTP_CLIENTS} clients)...")
+
+    # All clients share one session: its connection pool keeps TCP connections
+    # open (keep-alive) and reuses them instead of reconnecting per request
+    connector = aiohttp.TCPConnector(limit=50, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(http_client(session) for _ in range(HTTP_CLIENTS)))
 
 def generate_rabbitmq_traffic():
     """Generate messages to RabbitMQ"""
@@ -75,6 +98,15 @@ def generate_rabbitmq_traffic():
         channel = connection.channel()
         channel.queue_declare(queue='email_notifications', durable=True)
 
+        # Publisher confirms: basic_publish returns once RabbitMQ has stored
+        # the message (NackError if it was rejected). At a few messages per
+        # second the extra round trip per message costs nothing noticeable.
+        channel.confirm_delivery()
+
+        # Same properties for every message (persistent JSON), so build them once
+        properties = pika.BasicProperties(delivery_mode=2,
+                                          content_type='application/json')
+
         message_id = 1
         while True:
             try:
@@ -87,8 +119,8 @@ def generate_rabbitmq_traffic():
                 channel.basic_publish(
                     exchange='',
                     routing_key='email_notifications',
-                    body=json.dumps(message),
-                    properties=pika.BasicProperties(delivery_mode=2)
+                    body=orjson.dumps(message),  # bytes, no str round trip
+                    properties=properties
                 )
 
                 print(f"[RabbitMQ] Published message #{message_id}")
@@ -129,18 +161,14 @@ Metrics endpoints:
 Press CTRL+C to stop
 """)
 
-    # Start HTTP traffic generator in a thread
-    http_thread = Thread(target=generate_http_traffic, daemon=True)
-    http_thread.start()
-
     # Start RabbitMQ traffic generator in a thread
     rabbitmq_thread = Thread(target=generate_rabbitmq_traffic, daemon=True)
     rabbitmq_thread.start()
 
     try:
-        # Keep main thread alive
-        while True:
-            time.sleep(1)
+        # HTTP traffic runs in the main thread: all clients share one asyncio
+        # event loop, so a slow request doesn't hold up the others
+        asyncio.run(generate_http_traffic())
     except KeyboardInterrupt:
         print("\n[Load Generator] Stopping...")
         print("[Load Generator] Stopped")
@@ -14,10 +14,11 @@ Metrics exposed:
 - active_orders: Current number of active orders
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, request
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, REGISTRY
 import time
 import random
+import orjson
 
 app = Flask(__name__)
 
@@ -49,8 +50,63 @@ active_orders = Gauge(
 # Service name for labels
 SERVICE_NAME = 'order-service'
 
+# Endpoint label for each Flask view (keeps the '/api/orders/:id' style the
+# dashboards use). Views not listed here, like /metrics, are not recorded.
+ENDPOINT_LABELS = {
+    'health': '/health',
+    'get_orders': '/api/orders',
+    'create_order': '/api/orders',
+    'get_order': '/api/orders/:id',
+}
+
+# Label children are bound once and reused. labels() hashes the label tuple
+# and takes a lock on every call.
+request_counts = {}     # (method, endpoint, status) -> Counter child
+request_durations = {}  # (method, endpoint) -> Histogram child
+
+ORDERS_CREATED = orders_created.labels(service=SERVICE_NAME)
+ACTIVE_ORDERS = active_orders.labels(service=SERVICE_NAME)
+
 # Simulate some active orders
-active_orders.labels(service=SERVICE_NAME).set(42)
+ACTIVE_ORDERS.set(42)
+
+def make_json_response(data, status=200):
+    """Serialize data with orjson (bytes, no stdlib json) into a JSON response"""
+    return app.response_class(orjson.dumps(data), status=status, mimetype='application/json')
+
+@app.before_request
+def start_timer():
+    """Remember when the request started"""
+    g.start_time = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request count and latency once, for every handler and status"""
+    endpoint = ENDPOINT_LABELS.get(request.endpoint)
+    if endpoint is None:
+        return response
+
+    duration = time.perf_counter() - g.start_time
+    method = request.method
+    status = response.status_code
+
+    counter = request_counts.get((method, endpoint, status))
+    if counter is None:
+        counter = request_counts.setdefault(
+            (method, endpoint, status),
+            request_count.labels(method=method, endpoint=endpoint,
+                                 status=status, service=SERVICE_NAME))
+    counter.inc()
+
+    histogram = request_durations.get((method, endpoint))
+    if histogram is None:
+        histogram = request_durations.setdefault(
+            (method, endpoint),
+            request_duration.labels(method=method, endpoint=endpoint,
+                                    service=SERVICE_NAME))
+    histogram.observe(duration)
+
+    return response
 
 @app.route('/metrics')
 def metrics():
@@ -60,30 +116,13 @@ def metrics():
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    start_time = time.time()
-
     response = {'status': 'healthy', 'service': SERVICE_NAME}
 
-    request_count.labels(
-        method='GET',
-        endpoint='/health',
-        status=200,
-        service=SERVICE_NAME
-    ).inc()
-
-    request_duration.labels(
-        method='GET',
-        endpoint='/health',
-        service=SERVICE_NAME
-    ).observe(time.time() - start_time)
-
-    return jsonify(response), 200
+    return make_json_response(response, 200)
 
 @app.route('/api/orders', methods=['GET'])
 def get_orders():
     """Get all orders"""
-    start_time = time.time()
-
     try:
         # Simulate fetching orders from database
         time.sleep(random.uniform(0.01, 0.1))
@@ -94,38 +133,14 @@ def get_orders():
             {'id': 3, 'user_id': 789, 'total': 79.99, 'status': 'shipped'}
         ]
 
-        # Record metrics
-        request_count.labels(
-            method='GET',
-            endpoint='/api/orders',
-            status=200,
-            service=SERVICE_NAME
-        ).inc()
-
-        request_duration.labels(
-            method='GET',
-            endpoint='/api/orders',
-            service=SERVICE_NAME
-        ).observe(time.time() - start_time)
-
-        return jsonify(orders), 200
+        return make_json_response(orders, 200)
 
     except Exception as e:
-        # Record error
-        request_count.labels(
-            method='GET',
-            endpoint='/api/orders',
-            status=500,
-            service=SERVICE_NAME
-        ).inc()
-
-        return jsonify({'error': str(e)}), 500
+        return make_json_response({'error': str(e)}, 500)
 
 @app.route('/api/orders', methods=['POST'])
 def create_order():
     """Create a new order"""
-    start_time = time.time()
-
     try:
         data = request.get_json()
 
@@ -145,46 +160,17 @@ def create_order():
         }
 
         # Update metrics
-        orders_created.labels(service=SERVICE_NAME).inc()
-        active_orders.labels(service=SERVICE_NAME).inc()
-
-        request_count.labels(
-            method='POST',
-            endpoint='/api/orders',
-            status=201,
-            service=SERVICE_NAME
-        ).inc()
+        ORDERS_CREATED.inc()
+        ACTIVE_ORDERS.inc()
 
-        request_duration.labels(
-            method='POST',
-            endpoint='/api/orders',
-            service=SERVICE_NAME
-        ).observe(time.time() - start_time)
-
-        return jsonify(order), 201
+        return make_json_response(order, 201)
 
     except Exception as e:
-        # Record error metrics
-        request_count.labels(
-            method='POST',
-            endpoint='/api/orders',
-            status=500,
-            service=SERVICE_NAME
-        ).inc()
-
-        request_duration.labels(
-            method='POST',
-            endpoint='/api/orders',
-            service=SERVICE_NAME
-        ).observe(time.time() - start_time)
-
-        return jsonify({'error': str(e)}), 500
+        return make_json_response({'error': str(e)}, 500)
 
 @app.route('/api/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
     """Get specific order"""
-    start_time = time.time()
-
     try:
         # Simulate slow query occasionally
         if random.random() < 0.2:  # 20% chance of slow query
@@ -199,30 +185,10 @@ def get_order(order_id):
             'status': 'completed'
         }
 
-        request_count.labels(
-            method='GET',
-            endpoint='/api/orders/:id',
-            status=200,
-            service=SERVICE_NAME
-        ).inc()
-
-        request_duration.labels(
-            method='GET',
-            endpoint='/api/orders/:id',
-            service=SERVICE_NAME
-        ).observe(time.time() - start_time)
-
-        return jsonify(order), 200
+        return make_json_response(order, 200)
 
     except Exception as e:
-        request_count.labels(
-            method='GET',
-            endpoint='/api/orders/:id',
-            status=500,
-            service=SERVICE_NAME
-        ).inc()
-
-        return jsonify({'error': str(e)}), 500
+        return make_json_response({'error': str(e)}, 500)
 
 if __name__ == '__main__':
     print(f"[{SERVICE_NAME}] Starting on http://0.0.0.0:8001")
@@ -20,6 +20,8 @@ import json
 import time
 import sys
 import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from prometheus_client import Counter, Histogram, Gauge, start_http_server
 import random
 
@@ -62,6 +64,20 @@ RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')  # Defaults to localhost
 QUEUE_NAME = 'email_notifications'
 SERVICE_NAME = os.getenv('SERVICE_NAME', 'notification-consumer')
 
+# Up to PREFETCH_COUNT unacked messages are delivered to us at once and
+# handled by WORKER_THREADS threads, so slow emails no longer run one by one
+# on the connection's I/O thread
+PREFETCH_COUNT = int(os.getenv('PREFETCH_COUNT', '100'))
+WORKER_THREADS = int(os.getenv('WORKER_THREADS', '32'))
+QUEUE_DEPTH_INTERVAL = 30  # seconds between queue depth samples
+executor = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+
+# Settling state, only touched on the connection thread (see settle()).
+# Delivery tags on a channel count up from 1.
+next_tag = 1       # lowest delivery tag not settled yet
+done_ok = set()    # processed, waiting to be acked
+done_nack = set()  # already nacked individually
+
 def send_email(email, order_id):
     """Simulate sending email (with occasional failures for demo)"""
     # Simulate processing time
@@ -74,11 +90,15 @@ def send_email(email, order_id):
     print(f"[{SERVICE_NAME}] ✓ Sent email to {email} for order {order_id}")
 
 def callback(ch, method, properties, body):
-    """Process received message"""
+    """Hand a received message to the worker pool"""
     # Record that we received a message
     messages_received.labels(queue=QUEUE_NAME, service=SERVICE_NAME).inc()
 
-    start_time = time.time()
+    executor.submit(handle_message, body, method.delivery_tag)
+
+def handle_message(body, delivery_tag):
+    """Process one message on a worker thread"""
+    start_time = time.perf_counter()
 
     try:
         # Parse message
@@ -89,26 +109,50 @@ def callback(ch, method, properties, body):
         send_email(data.get('email'), data.get('order_id'))
 
         # Record successful processing
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         processing_time.labels(queue=QUEUE_NAME, service=SERVICE_NAME).observe(duration)
         messages_processed.labels(queue=QUEUE_NAME, service=SERVICE_NAME).inc()
-
-        # Acknowledge message
-        ch.basic_ack(delivery_tag=method.delivery_tag)
         print(f"[{SERVICE_NAME}] Message processed in {duration:.2f}s")
+        ok = True
 
     except Exception as e:
         # Record failed processing
         messages_failed.labels(queue=QUEUE_NAME, service=SERVICE_NAME).inc()
 
         print(f"[{SERVICE_NAME}] ✗ Error processing message: {e}")
+        ok = False
+
+    # pika channels are not thread-safe: ack/nack on the connection thread
+    connection.add_callback_threadsafe(functools.partial(settle, delivery_tag, ok))
 
+def settle(delivery_tag, ok):
+    """Ack or nack a finished message (runs on the connection thread)"""
+    global next_tag
+
+    if ok:
+        done_ok.add(delivery_tag)
+    else:
         # NACK and requeue for retry
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+        done_nack.add(delivery_tag)
         print(f"[{SERVICE_NAME}] Message requeued for retry")
 
+    # Messages finish out of order. Walk forward over the settled prefix and
+    # ack it with one multiple=True ack instead of one ack per message.
+    last_ok = None
+    while next_tag in done_ok or next_tag in done_nack:
+        if next_tag in done_ok:
+            done_ok.remove(next_tag)
+            last_ok = next_tag
+        else:
+            done_nack.remove(next_tag)
+        next_tag += 1
+
+    if last_ok is not None:
+        channel.basic_ack(delivery_tag=last_ok, multiple=True)
+
 def update_queue_depth(channel):
-    """Update queue depth metric"""
+    """Update queue depth metric, then again every QUEUE_DEPTH_INTERVAL seconds"""
     try:
         method = channel.queue_declare(queue=QUEUE_NAME, passive=True)
         depth = method.method.message_count
@@ -117,6 +161,10 @@ def update_queue_depth(channel):
     except Exception as e:
         print(f"[{SERVICE_NAME}] Could not get queue depth: {e}")
 
+    # Runs on the connection thread while consuming; Prometheus scrapes
+    # just read the gauge
+    connection.call_later(QUEUE_DEPTH_INTERVAL, lambda: update_queue_depth(channel))
+
 # Connect to RabbitMQ with retry logic
 print(f"[{SERVICE_NAME}] Connecting to RabbitMQ at {RABBITMQ_HOST}...")
 max_retries = 30
@@ -154,10 +202,10 @@ if connection is None:
 # Declare queue
 channel.queue_declare(queue=QUEUE_NAME, durable=True)
 
-# Set prefetch count for fair dispatch
-channel.basic_qos(prefetch_count=1)
+# Let RabbitMQ keep PREFETCH_COUNT unacked messages in flight to us
+channel.basic_qos(prefetch_count=PREFETCH_COUNT)
 
-# Get initial queue depth
+# Get initial queue depth (and keep sampling it while consuming)
 update_queue_depth(channel)
 
 # Start consuming messages
@@ -179,5 +227,6 @@ try:
 except KeyboardInterrupt:
     print(f"\n[{SERVICE_NAME}] Shutting down...")
     channel.stop_consuming()
+    executor.shutdown(wait=False, cancel_futures=True)
     connection.close()
     print(f"[{SERVICE_NAME}] Stopped")
@@ -9,12 +9,16 @@ Usage:
     python recommendation_service.py
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, request
 import joblib
 import numpy as np
 import redis
-import json
+import orjson
+import hashlib
 import os
+import queue
+import threading
+import time
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
 
 app = Flask(__name__)
@@ -23,13 +27,33 @@ app = Flask(__name__)
 REDIS_HOST = os.getenv('REDIS_HOST', 'redis')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))  # 1 hour
+PRECOMPUTE_RECS = os.getenv('PRECOMPUTE_RECS', '1') == '1'
+PRECOMPUTE_BATCH = 1000  # users scored (and written to Redis) per batch
+DEFAULT_TOP_N = 5
+# The cache always holds the top MAX_TOP_N items per user; a request for
+# top_n items gets the first top_n of them, so one entry serves every top_n
+MAX_TOP_N = 20
+
+# Each cached user is a hash recs:{user_id} holding the JSON 'body' and its
+# 'etag', so repeat requests with If-None-Match get a 304 without the body.
+# Sorted set of cached user ids, scored by when their cache entry expires.
+# Lets /metrics count active users without SCANning the whole keyspace.
+# Kept outside the recs:* namespace: user ids come from the URL, so a user
+# called 'active' must not be able to collide with (and expire) this key.
+ACTIVE_KEY = 'active:recs'
+
+# Cache writes are queued and sent by a background thread in pipelines of up
+# to WRITE_BATCH, so a cache miss doesn't wait for a Redis round trip
+WRITE_BATCH = 64
+WRITE_FLUSH_INTERVAL = 0.02  # seconds to wait for more writes to batch
+SAMPLE_INTERVAL = 10  # seconds between active users gauge updates
 
 # Redis client
 try:
     redis_client = redis.Redis(
         host=REDIS_HOST,
         port=REDIS_PORT,
-        decode_responses=True,
+        decode_responses=False,  # cache holds raw JSON bytes
         socket_connect_timeout=5
     )
     redis_client.ping()
@@ -38,13 +62,104 @@ except Exception as e:
     print(f"⚠️  Redis not available: {e}")
     redis_client = None
 
+write_queue = queue.Queue()
+
+# Background threads are started lazily: with gunicorn --preload this module
+# is imported before the workers fork, and threads don't survive a fork, so
+# each process starts its own on first use
+background_lock = threading.Lock()
+background_pids = {}  # thread function -> pid of the process running it
+
+def start_background(target):
+    """Start target in a daemon thread, once per process"""
+    if background_pids.get(target) != os.getpid():
+        with background_lock:
+            if background_pids.get(target) != os.getpid():
+                threading.Thread(target=target, daemon=True).start()
+                background_pids[target] = os.getpid()
+
+def cache_writer():
+    """Background thread: flush queued cache writes to Redis in pipelines"""
+    while True:
+        batch = [write_queue.get()]
+        deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+        while len(batch) < WRITE_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(write_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            expires_at = time.time() + CACHE_TTL
+            for user_id, body, etag in batch:
+                add_cache_entry(pipe, user_id, body, etag, expires_at)
+            pipe.execute()
+        except Exception as e:
+            print(f"Cache write error: {e}")
+
+def body_etag(body):
+    """Short, stable ETag for a response body"""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def add_cache_entry(pipe, user_id, body, etag, expires_at):
+    """Add the commands caching one user's response to a Redis pipeline"""
+    cache_key = f"recs:{user_id}"
+    pipe.hset(cache_key, mapping={'body': body, 'etag': etag})
+    pipe.expire(cache_key, CACHE_TTL)
+    pipe.zadd(ACTIVE_KEY, {user_id: expires_at})
+
+def sample_active_users():
+    """Background thread: update the active users gauge every SAMPLE_INTERVAL"""
+    while True:
+        try:
+            # Drop users whose cache entry has expired, then count the rest
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.zremrangebyscore(ACTIVE_KEY, '-inf', time.time())
+            pipe.zcard(ACTIVE_KEY)
+            _, count = pipe.execute()
+            active_users.set(count)
+        except Exception as e:
+            print(f"Active users sample error: {e}")
+
+        time.sleep(SAMPLE_INTERVAL)
+
+def slice_recommendations(body, etag, top_n):
+    """Cut a cached top-MAX_TOP_N body down to top_n items, with its ETag"""
+    if top_n >= MAX_TOP_N:
+        return body, etag
+    result = orjson.loads(body)
+    result['recommendations'] = result['recommendations'][:top_n]
+    body = orjson.dumps(result)
+    return body, body_etag(body)
+
+def queue_cache_write(user_id, body, etag):
+    """Queue a recommendation response for writing to the Redis cache"""
+    start_background(cache_writer)
+    write_queue.put_nowait((user_id, body, etag))
+
 # Load pre-trained model
 print("Loading ML model...")
-user_features = joblib.load('user_features.pkl')
-item_features = joblib.load('item_features.pkl')
-user_ids = joblib.load('user_ids.pkl')
-item_ids = joblib.load('item_ids.pkl')
+# float32 + C-contiguous: the scoring np.dot moves half the bytes of float64
+# and runs as a stride-1 SGEMV. item_features is NMF's components_, already
+# [latent, items], so no transpose is needed.
+# mmap_mode='r' maps the .npy arrays straight from the files, so all
+# gunicorn workers share one copy in the page cache. The training script
+# saves them as float32 already, so no conversion (copy) is needed.
+user_features = np.ascontiguousarray(
+    np.load('user_features.npy', mmap_mode='r'), dtype=np.float32)
+item_features = np.ascontiguousarray(
+    np.load('item_features.npy', mmap_mode='r'), dtype=np.float32)
+user_ids = np.load('user_ids.npy').tolist()
+item_ids = np.load('item_ids.npy').tolist()
 item_names = joblib.load('item_names.pkl')
+
+# user_id -> row in user_features, so lookups are O(1) instead of list.index()
+USER_IDX = {uid: i for i, uid in enumerate(user_ids)}
+ITEM_IDS_ARR = np.asarray(item_ids)
 print(f"✅ Model loaded: {len(user_ids)} users, {len(item_ids)} items")
 
 # Prometheus metrics
@@ -78,10 +193,12 @@ active_users = Gauge(
 def get_recommendations(user_id, top_n=5):
     """Generate recommendations for a user"""
     try:
-        user_idx = user_ids.index(int(user_id))
-    except (ValueError, IndexError):
+        user_idx = USER_IDX.get(int(user_id))
+    except ValueError:
+        user_idx = None
+    if user_idx is None:
         # User not in training data - return popular items
-        return get_popular_items(top_n)
+        return POPULAR_ITEMS[:max(top_n, 0)]
 
     # Get user's feature vector
     user_vector = user_features[user_idx]
@@ -89,13 +206,21 @@ def get_recommendations(user_id, top_n=5):
     # Compute scores for all items
     scores = np.dot(user_vector, item_features)
 
-    # Get top N items
-    top_indices = np.argsort(scores)[-top_n:][::-1]
+    # Get top N items: argpartition finds the N best in O(items) without
+    # sorting the whole catalog, then only those N are sorted by score
+    if 0 < top_n < len(scores):
+        idx = np.argpartition(scores, -top_n)[-top_n:]
+        top_indices = idx[np.argsort(-scores[idx])]
+    else:
+        top_indices = np.argsort(scores)[-top_n:][::-1]
 
+    return format_recommendations(top_indices, scores[top_indices])
+
+def format_recommendations(top_indices, top_scores):
+    """Turn item indices and their scores into the API's item dicts"""
     recommendations = []
-    for idx in top_indices:
-        item_id = item_ids[idx]
-        score = float(scores[idx])
+    for item_id, score in zip(ITEM_IDS_ARR[top_indices].tolist(),
+                              top_scores.tolist()):
         name = item_names.get(item_id, f"Item {item_id}")
 
         recommendations.append({
@@ -118,10 +243,65 @@ def get_popular_items(top_n=5):
         })
     return popular
 
+# The popular list only depends on the model files, so build it (and the
+# /api/popular response bodies for top_n = 0..20) once at startup
+POPULAR_ITEMS = get_popular_items(20)
+POPULAR_JSON = [orjson.dumps({'popular_items': POPULAR_ITEMS[:n]}) for n in range(21)]
+
+def precompute_recommendations(top_n=MAX_TOP_N):
+    """Score every known user up front and load the results into Redis"""
+    # One matrix-matrix product per batch of users (BLAS runs this far
+    # faster than one np.dot per request), then a pipelined bulk write,
+    # so requests for known users become plain cache hits.
+    top_n = min(top_n, len(ITEM_IDS_ARR))
+    expires_at = time.time() + CACHE_TTL
+    for start in range(0, len(user_ids), PRECOMPUTE_BATCH):
+        batch_ids = user_ids[start:start + PRECOMPUTE_BATCH]
+        scores = user_features[start:start + PRECOMPUTE_BATCH] @ item_features
+
+        # Top N per row: partition, then sort just those N columns
+        top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        pipe = redis_client.pipeline(transaction=False)
+        for uid, row, row_scores in zip(batch_ids, top, top_scores):
+            user_id = str(uid)
+            body = orjson.dumps({
+                'user_id': user_id,
+                'recommendations': format_recommendations(row, row_scores),
+                'cached': False
+            })
+            add_cache_entry(pipe, user_id, body, body_etag(body), expires_at)
+        pipe.execute()
+
+    print(f"✅ Precomputed recommendations for {len(user_ids)} users")
+
+if redis_client and PRECOMPUTE_RECS:
+    try:
+        precompute_recommendations()
+    except Exception as e:
+        print(f"⚠️  Precomputing recommendations failed: {e}")
+
+def make_json_response(data, status=200):
+    """Serialize data with orjson (bytes, no stdlib json) into a JSON response"""
+    return app.response_class(orjson.dumps(data), status=status, mimetype='application/json')
+
+def recommendations_response(body, etag):
+    """Return a recommendations body with its ETag, or 304 if the client has it"""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'service': 'recommendation-service'})
+    return make_json_response({'status': 'healthy', 'service': 'recommendation-service'})
 
 @app.route('/api/recommendations/<user_id>')
 def api_recommendations(user_id):
@@ -129,25 +309,27 @@ def api_recommendations(user_id):
     with latency.labels(endpoint='recommendations').time():
         requests_total.labels(endpoint='recommendations').inc()
 
+        top_n = request.args.get('top_n', default=DEFAULT_TOP_N, type=int)
+        top_n = max(0, min(top_n, MAX_TOP_N))  # Max 20 recommendations
+
         # Check cache
         cache_key = f"recs:{user_id}"
         if redis_client:
             try:
-                cached = redis_client.get(cache_key)
-                if cached:
+                body, etag = redis_client.hmget(cache_key, 'body', 'etag')
+                if body:
                     cache_hits.inc()
-                    return cached, 200, {'Content-Type': 'application/json'}
+                    body, etag = slice_recommendations(body, etag.decode(), top_n)
+                    return recommendations_response(body, etag)
             except Exception as e:
                 print(f"Cache read error: {e}")
 
-        # Cache miss - generate recommendations
+        # Cache miss - generate recommendations (the full top MAX_TOP_N, which
+        # is what gets cached, then cut down to top_n for this response)
         cache_misses.inc()
         model_predictions.inc()
 
-        top_n = request.args.get('top_n', default=5, type=int)
-        top_n = min(top_n, 20)  # Max 20 recommendations
-
-        recommendations = get_recommendations(user_id, top_n)
+        recommendations = get_recommendations(user_id, MAX_TOP_N)
 
         result = {
             'user_id': user_id,
@@ -155,16 +337,15 @@ def api_recommendations(user_id):
             'cached': False
         }
 
-        response_json = json.dumps(result)
+        # orjson returns bytes, which go to Redis and Flask unchanged
+        response_json = orjson.dumps(result)
+        etag = body_etag(response_json)
 
-        # Cache result
+        # Cache result (written in the background, see cache_writer)
         if redis_client:
-            try:
-                redis_client.setex(cache_key, CACHE_TTL, response_json)
-            except Exception as e:
-                print(f"Cache write error: {e}")
+            queue_cache_write(user_id, response_json, etag)
 
-        return response_json, 200, {'Content-Type': 'application/json'}
+        return recommendations_response(*slice_recommendations(response_json, etag, top_n))
 
 @app.route('/api/popular')
 def api_popular():
@@ -173,36 +354,24 @@ def api_popular():
         requests_total.labels(endpoint='popular').inc()
 
         top_n = request.args.get('top_n', default=10, type=int)
-        popular = get_popular_items(min(top_n, 20))
+        body = POPULAR_JSON[max(0, min(top_n, 20))]
 
-        return jsonify({
-            'popular_items': popular
-        })
+        return body, 200, {'Content-Type': 'application/json'}
 
 @app.route('/metrics')
 def metrics():
     """Prometheus metrics endpoint"""
-    # Update active users gauge
+    # The active users gauge is kept up to date by sample_active_users,
+    # so a scrape only reads metrics and never waits on Redis
     if redis_client:
-        try:
-            # Count keys matching "recs:*"
-            cursor = 0
-            count = 0
-            while True:
-                cursor, keys = redis_client.scan(cursor, match='recs:*', count=100)
-                count += len(keys)
-                if cursor == 0:
-                    break
-            active_users.set(count)
-        except:
-            pass
+        start_background(sample_active_users)
 
     return generate_latest()
 
 @app.route('/')
 def index():
     """API documentation"""
-    return jsonify({
+    return make_json_response({
         'service': 'Recommendation Service',
         'version': '1.0.0',
         'endpoints': {
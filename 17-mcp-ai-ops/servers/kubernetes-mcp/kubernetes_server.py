@@ -7,131 +7,269 @@ check pod status, view logs, and more.
 """
 
 import asyncio
-import subprocess
-import json
+from datetime import datetime, timezone
+from kubernetes import client, config
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
 app = Server("kubernetes-mcp")
 
-def run_kubectl(args: list[str]):
-    """Execute kubectl command"""
+# Give up on an API request after this many seconds (like kubectl's timeout)
+REQUEST_TIMEOUT = 30
+
+# Kubernetes API clients, created once at startup. They read the same
+# kubeconfig as kubectl and keep one HTTPS connection to the API server open,
+# instead of starting a kubectl process (and a new TLS handshake) per call.
+# Inside a pod there is no kubeconfig, so fall back to the service account.
+# If neither works the server still starts and each tool call reports why.
+CONFIG_ERROR = None
+try:
+    config.load_kube_config()
+except config.ConfigException:
     try:
-        cmd = ['kubectl'] + args
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        config.load_incluster_config()
+    except config.ConfigException as e:
+        CONFIG_ERROR = f"No Kubernetes configuration found: {e}"
 
-        if result.returncode == 0:
-            return {
-                "success": True,
-                "output": result.stdout
-            }
-        else:
-            return {
-                "success": False,
-                "error": result.stderr
-            }
+CORE = client.CoreV1Api()
+APPS = client.AppsV1Api()
+
+async def call_k8s(func, *args, **kwargs):
+    """Call a Kubernetes API method without blocking the MCP event loop"""
+    if CONFIG_ERROR:
+        return {
+            "success": False,
+            "error": CONFIG_ERROR
+        }
+
+    kwargs.setdefault('_request_timeout', REQUEST_TIMEOUT)
+    try:
+        # The client is synchronous, so run the request in a worker thread
+        return {
+            "success": True,
+            "output": await asyncio.to_thread(func, *args, **kwargs)
+        }
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
         }
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available tools"""
-    return [
-        Tool(
-            name="get_pods",
-            description="List all pods in a namespace",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "namespace": {
-                        "type": "string",
-                        "description": "Namespace (default: default)",
-                        "default": "default"
-                    }
+def age(timestamp):
+    """Short age like kubectl prints it (45s, 12m, 3h, 5d)"""
+    if timestamp is None:
+        return "<unknown>"
+    seconds = int((datetime.now(timezone.utc) - timestamp).total_seconds())
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+def format_table(headers: list[str], rows: list[list]):
+    """Format rows as a plain text table with aligned columns"""
+    rows = [headers] + [[str(value) for value in row] for row in rows]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(headers))]
+    return "\n".join(
+        "   ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+        for row in rows
+    )
+
+def format_pods(pods):
+    """Format a V1PodList like 'kubectl get pods -o wide'"""
+    rows = []
+    for pod in pods.items:
+        statuses = pod.status.container_statuses or []
+        ready = sum(1 for s in statuses if s.ready)
+        restarts = sum(s.restart_count for s in statuses)
+        rows.append([
+            pod.metadata.name,
+            f"{ready}/{len(pod.spec.containers)}",
+            pod.status.phase,
+            restarts,
+            age(pod.metadata.creation_timestamp),
+            pod.status.pod_ip or "<none>",
+            pod.spec.node_name or "<none>"
+        ])
+    return format_table(["NAME", "READY", "STATUS", "RESTARTS", "AGE", "IP", "NODE"], rows)
+
+def format_services(services):
+    """Format a V1ServiceList like 'kubectl get services -o wide'"""
+    rows = []
+    for svc in services.items:
+        ingress = (svc.status.load_balancer.ingress or []) if svc.status.load_balancer else []
+        # The field is 'external_ips' in kubernetes client 36+, 'external_i_ps' before
+        external_ips = getattr(svc.spec, 'external_ips', None) or getattr(svc.spec, 'external_i_ps', None)
+        external = [i.ip or i.hostname for i in ingress] + (external_ips or [])
+        ports = ",".join(
+            f"{p.port}:{p.node_port}/{p.protocol}" if p.node_port else f"{p.port}/{p.protocol}"
+            for p in svc.spec.ports or []
+        )
+        selector = ",".join(f"{k}={v}" for k, v in (svc.spec.selector or {}).items())
+        rows.append([
+            svc.metadata.name,
+            svc.spec.type,
+            svc.spec.cluster_ip,
+            ",".join(external) or "<none>",
+            ports or "<none>",
+            age(svc.metadata.creation_timestamp),
+            selector or "<none>"
+        ])
+    return format_table(["NAME", "TYPE", "CLUSTER-IP", "EXTERNAL-IP", "PORT(S)", "AGE", "SELECTOR"], rows)
+
+def format_deployments(deployments):
+    """Format a V1DeploymentList like 'kubectl get deployments -o wide'"""
+    rows = []
+    for dep in deployments.items:
+        rows.append([
+            dep.metadata.name,
+            f"{dep.status.ready_replicas or 0}/{dep.spec.replicas}",
+            dep.status.updated_replicas or 0,
+            dep.status.available_replicas or 0,
+            age(dep.metadata.creation_timestamp),
+            ",".join(c.image for c in dep.spec.template.spec.containers)
+        ])
+    return format_table(["NAME", "READY", "UP-TO-DATE", "AVAILABLE", "AGE", "IMAGES"], rows)
+
+def format_pod_description(pod, events):
+    """Format a V1Pod and its events, similar to 'kubectl describe pod'"""
+    labels = ", ".join(f"{k}={v}" for k, v in (pod.metadata.labels or {}).items())
+    lines = [
+        f"Name:        {pod.metadata.name}",
+        f"Namespace:   {pod.metadata.namespace}",
+        f"Node:        {pod.spec.node_name or '<none>'}",
+        f"Start Time:  {pod.status.start_time}",
+        f"Labels:      {labels or '<none>'}",
+        f"Status:      {pod.status.phase}",
+        f"IP:          {pod.status.pod_ip or '<none>'}",
+        "Containers:"
+    ]
+
+    statuses = {s.name: s for s in pod.status.container_statuses or []}
+    for container in pod.spec.containers:
+        lines.append(f"  {container.name}:")
+        lines.append(f"    Image:          {container.image}")
+        status = statuses.get(container.name)
+        if status:
+            # Exactly one of running/waiting/terminated is set
+            state = status.state
+            if state.running:
+                lines.append(f"    State:          Running (since {state.running.started_at})")
+            elif state.waiting:
+                lines.append(f"    State:          Waiting ({state.waiting.reason})")
+            elif state.terminated:
+                lines.append(f"    State:          Terminated ({state.terminated.reason}, "
+                             f"exit code {state.terminated.exit_code})")
+            lines.append(f"    Ready:          {status.ready}")
+            lines.append(f"    Restart Count:  {status.restart_count}")
+
+    lines.append("Conditions:")
+    for condition in pod.status.conditions or []:
+        lines.append(f"  {condition.type}: {condition.status}")
+
+    lines.append("Events:")
+    if events.items:
+        for event in events.items:
+            lines.append(f"  {event.type}  {event.reason}  {event.message}")
+    else:
+        lines.append("  <none>")
+
+    return "\n".join(lines)
+
+# Tool definitions are plain data, so build them once at startup and
+# return the same list from every list_tools() call
+TOOLS = [
+    Tool(
+        name="get_pods",
+        description="List all pods in a namespace",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "namespace": {
+                    "type": "string",
+                    "description": "Namespace (default: default)",
+                    "default": "default"
                 }
             }
-        ),
-        Tool(
-            name="get_pod_logs",
-            description="Get logs from a specific pod",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pod_name": {
-                        "type": "string",
-                        "description": "Name of the pod"
-                    },
-                    "namespace": {
-                        "type": "string",
-                        "description": "Namespace (default: default)",
-                        "default": "default"
-                    },
-                    "tail": {
-                        "type": "integer",
-                        "description": "Number of lines to show (default: 50)",
-                        "default": 50
-                    }
+        }
+    ),
+    Tool(
+        name="get_pod_logs",
+        description="Get logs from a specific pod",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "pod_name": {
+                    "type": "string",
+                    "description": "Name of the pod"
                 },
-                "required": ["pod_name"]
-            }
-        ),
-        Tool(
-            name="describe_pod",
-            description="Get detailed information about a pod",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pod_name": {
-                        "type": "string",
-                        "description": "Name of the pod"
-                    },
-                    "namespace": {
-                        "type": "string",
-                        "description": "Namespace (default: default)",
-                        "default": "default"
-                    }
+                "namespace": {
+                    "type": "string",
+                    "description": "Namespace (default: default)",
+                    "default": "default"
                 },
-                "required": ["pod_name"]
-            }
-        ),
-        Tool(
-            name="get_services",
-            description="List all services in a namespace",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "namespace": {
-                        "type": "string",
-                        "description": "Namespace (default: default)",
-                        "default": "default"
-                    }
+                "tail": {
+                    "type": "integer",
+                    "description": "Number of lines to show (default: 50)",
+                    "default": 50
+                }
+            },
+            "required": ["pod_name"]
+        }
+    ),
+    Tool(
+        name="describe_pod",
+        description="Get detailed information about a pod",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "pod_name": {
+                    "type": "string",
+                    "description": "Name of the pod"
+                },
+                "namespace": {
+                    "type": "string",
+                    "description": "Namespace (default: default)",
+                    "default": "default"
+                }
+            },
+            "required": ["pod_name"]
+        }
+    ),
+    Tool(
+        name="get_services",
+        description="List all services in a namespace",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "namespace": {
+                    "type": "string",
+                    "description": "Namespace (default: default)",
+                    "default": "default"
                 }
             }
-        ),
-        Tool(
-            name="get_deployments",
-            description="List all deployments in a namespace",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "namespace": {
-                        "type": "string",
-                        "description": "Namespace (default: default)",
-                        "default": "default"
-                    }
+        }
+    ),
+    Tool(
+        name="get_deployments",
+        description="List all deployments in a namespace",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "namespace": {
+                    "type": "string",
+                    "description": "Namespace (default: default)",
+                    "default": "default"
                 }
             }
-        )
-    ]
+        }
+    )
+]
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available tools"""
+    return TOOLS
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
@@ -139,10 +277,10 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
     if name == "get_pods":
         namespace = arguments.get("namespace", "default")
-        result = run_kubectl(['get', 'pods', '-n', namespace, '-o', 'wide'])
+        result = await call_k8s(CORE.list_namespaced_pod, namespace)
 
         if result.get('success'):
-            output = f"Pods in namespace '{namespace}':\n{result.get('output')}"
+            output = f"Pods in namespace '{namespace}':\n{format_pods(result.get('output'))}"
         else:
             output = f"Error: {result.get('error')}"
 
@@ -153,12 +291,12 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         namespace = arguments.get("namespace", "default")
         tail = arguments.get("tail", 50)
 
-        result = run_kubectl([
-            'logs',
+        result = await call_k8s(
+            CORE.read_namespaced_pod_log,
             pod_name,
-            '-n', namespace,
-            '--tail', str(tail)
-        ])
+            namespace,
+            tail_lines=int(tail)
+        )
 
         if result.get('success'):
             output = f"Logs for pod '{pod_name}':\n{result.get('output')}"
@@ -171,21 +309,27 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         pod_name = arguments.get("pod_name", "")
         namespace = arguments.get("namespace", "default")
 
-        result = run_kubectl(['describe', 'pod', pod_name, '-n', namespace])
+        # Fetch the pod and its events concurrently
+        result, events = await asyncio.gather(
+            call_k8s(CORE.read_namespaced_pod, pod_name, namespace),
+            call_k8s(CORE.list_namespaced_event, namespace,
+                     field_selector=f"involvedObject.kind=Pod,involvedObject.name={pod_name}")
+        )
 
-        if result.get('success'):
-            output = f"Description of pod '{pod_name}':\n{result.get('output')}"
+        if result.get('success') and events.get('success'):
+            description = format_pod_description(result.get('output'), events.get('output'))
+            output = f"Description of pod '{pod_name}':\n{description}"
         else:
-            output = f"Error: {result.get('error')}"
+            output = f"Error: {result.get('error') or events.get('error')}"
 
         return [TextContent(type="text", text=output)]
 
     elif name == "get_services":
         namespace = arguments.get("namespace", "default")
-        result = run_kubectl(['get', 'services', '-n', namespace, '-o', 'wide'])
+        result = await call_k8s(CORE.list_namespaced_service, namespace)
 
         if result.get('success'):
-            output = f"Services in namespace '{namespace}':\n{result.get('output')}"
+            output = f"Services in namespace '{namespace}':\n{format_services(result.get('output'))}"
         else:
             output = f"Error: {result.get('error')}"
 
@@ -193,10 +337,10 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
     elif name == "get_deployments":
         namespace = arguments.get("namespace", "default")
-        result = run_kubectl(['get', 'deployments', '-n', namespace, '-o', 'wide'])
+        result = await call_k8s(APPS.list_namespaced_deployment, namespace)
 
         if result.get('success'):
-            output = f"Deployments in namespace '{namespace}':\n{result.get('output')}"
+            output = f"Deployments in namespace '{namespace}':\n{format_deployments(result.get('output'))}"
         else:
             output = f"Error: {result.get('error')}"
 
@@ -7,12 +7,14 @@ against your PostgreSQL database from Tutorial 8.
 """
 
 import asyncio
+import itertools
 import os
+import sqlparse
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 
 # Database configuration
 DB_CONFIG = {
@@ -23,30 +25,69 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'postgres')
 }
 
+# Result limits: rows are streamed from a server-side cursor FETCH_SIZE at a
+# time, and at most MAX_ROWS are returned (the result says "truncated")
+FETCH_SIZE = 1000
+MAX_ROWS = 10_000
+
 # Create MCP server instance
 app = Server("postgres-mcp")
 
-def execute_query(sql: str):
-    """Execute a read-only SQL query"""
-    # Security: only allow SELECT statements
-    sql_upper = sql.strip().upper()
-    if not sql_upper.startswith('SELECT'):
+# Connection pool, created on first use (so the server starts even if the
+# database is down). Reusing connections skips the TCP/auth handshake and
+# backend startup that a fresh psycopg2.connect() costs on every query.
+connection_pool = None
+
+def get_pool():
+    """Return the shared connection pool, creating it on first use"""
+    global connection_pool
+    if connection_pool is None:
+        connection_pool = ThreadedConnectionPool(minconn=1, maxconn=8, **DB_CONFIG)
+    return connection_pool
+
+def is_single_select(sql: str) -> bool:
+    """True if sql is exactly one SELECT statement (WITH ... SELECT included)"""
+    statements = [s for s in sqlparse.parse(sql) if s.value.strip(' \t\r\n;')]
+    return len(statements) == 1 and statements[0].get_type() == 'SELECT'
+
+def execute_query(sql: str, params=None):
+    """Execute a read-only SQL query (values go in params, never into sql)"""
+    # Security: only allow a single SELECT statement
+    if not is_single_select(sql):
         return {"error": "Only SELECT queries are allowed"}
 
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        cursor.execute(sql)
-        results = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
+        pool = get_pool()
+        conn = pool.getconn()
+        try:
+            # Read-only session: PostgreSQL itself refuses writes, even ones
+            # hidden in a CTE. Set once per (new) connection.
+            if not conn.readonly:
+                conn.set_session(readonly=True)
+
+            # Named cursor = server-side cursor: rows arrive FETCH_SIZE at a
+            # time while we iterate, instead of the whole result at once
+            cursor = conn.cursor(name='mcp_query', cursor_factory=RealDictCursor)
+            cursor.itersize = FETCH_SIZE
+
+            # With params, psycopg2 sends the values separately from the SQL
+            # text, so they can't inject SQL and the query text stays the same
+            cursor.execute(sql, params)
+            results = [dict(row) for row in itertools.islice(cursor, MAX_ROWS + 1)]
+            truncated = len(results) > MAX_ROWS
+            del results[MAX_ROWS:]
+
+            cursor.close()
+            conn.rollback()  # end the read-only transaction
+        finally:
+            # Hand the connection back; drop it if it broke (e.g. DB restart)
+            pool.putconn(conn, close=bool(conn.closed))
 
         return {
             "success": True,
             "rows": len(results),
-            "data": [dict(row) for row in results]
+            "truncated": truncated,
+            "data": results
         }
     except Exception as e:
         return {
@@ -54,47 +95,51 @@ def execute_query(sql: str):
             "error": str(e)
         }
 
+# Tool definitions are plain data, so build them once at startup and
+# return the same list from every list_tools() call
+TOOLS = [
+    Tool(
+        name="query_database",
+        description="Execute a read-only SQL query against PostgreSQL. Only SELECT statements are allowed.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "sql": {
+                    "type": "string",
+                    "description": "SQL SELECT query to execute"
+                }
+            },
+            "required": ["sql"]
+        }
+    ),
+    Tool(
+        name="list_tables",
+        description="List all tables in the database",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="describe_table",
+        description="Show the schema of a specific table",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {
+                    "type": "string",
+                    "description": "Name of the table to describe"
+                }
+            },
+            "required": ["table_name"]
+        }
+    )
+]
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools"""
-    return [
-        Tool(
-            name="query_database",
-            description="Execute a read-only SQL query against PostgreSQL. Only SELECT statements are allowed.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "sql": {
-                        "type": "string",
-                        "description": "SQL SELECT query to execute"
-                    }
-                },
-                "required": ["sql"]
-            }
-        ),
-        Tool(
-            name="list_tables",
-            description="List all tables in the database",
-            inputSchema={
-                "type": "object",
-                "properties": {}
-            }
-        ),
-        Tool(
-            name="describe_table",
-            description="Show the schema of a specific table",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Name of the table to describe"
-                    }
-                },
-                "required": ["table_name"]
-            }
-        )
-    ]
+    return TOOLS
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
@@ -124,13 +169,13 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
     elif name == "describe_table":
         table_name = arguments.get("table_name", "")
-        sql = f"""
+        sql = """
             SELECT column_name, data_type, is_nullable
             FROM information_schema.columns
-            WHERE table_name = '{table_name}'
+            WHERE table_name = %s
             ORDER BY ordinal_position
         """
-        result = execute_query(sql)
+        result = execute_query(sql, (table_name,))
         if result.get('success'):
             schema = "\n".join(
                 f"  {row['column_name']}: {row['data_type']} ({'NULL' if row['is_nullable'] == 'YES' else 'NOT NULL'})"
@@ -7,16 +7,23 @@ check service health, and analyze performance.
 """
 
 import asyncio
+import orjson
 import os
 import requests
 from datetime import datetime, timedelta
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
+from requests.adapters import HTTPAdapter
 
 # Prometheus configuration
 PROMETHEUS_URL = os.getenv('PROMETHEUS_URL', 'http://localhost:9090')
 
+# One HTTP session for all queries: it keeps connections to Prometheus open
+# (keep-alive) instead of doing a new TCP connect for every request
+SESSION = requests.Session()
+SESSION.mount(PROMETHEUS_URL, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 app = Server("prometheus-mcp")
 
 def query_prometheus(query: str):
@@ -25,10 +32,11 @@ def query_prometheus(query: str):
         url = f"{PROMETHEUS_URL}/api/v1/query"
         params = {'query': query}
 
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
 
-        data = response.json()
+        # orjson parses the raw bytes, faster than the stdlib json decoder
+        data = orjson.loads(response.content)
 
         if data['status'] == 'success':
             return {
@@ -68,10 +76,12 @@ def query_prometheus_range(query: str, duration: str = "1h"):
             'step': '30s'
         }
 
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
 
-        data = response.json()
+        # orjson parses the raw bytes; much faster than the stdlib json
+        # decoder on big range-query results (thousands of [ts, value] pairs)
+        data = orjson.loads(response.content)
 
         if data['status'] == 'success':
             return {
@@ -89,72 +99,76 @@ def query_prometheus_range(query: str, duration: str = "1h"):
             "error": str(e)
         }
 
+# Tool definitions are plain data, so build them once at startup and
+# return the same list from every list_tools() call
+TOOLS = [
+    Tool(
+        name="query_metrics",
+        description="Execute a PromQL query to get current metric values",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "PromQL query (e.g., 'up', 'rate(http_requests_total[5m])')"
+                }
+            },
+            "required": ["query"]
+        }
+    ),
+    Tool(
+        name="query_metrics_range",
+        description="Execute a PromQL range query to get metrics over time",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "PromQL query"
+                },
+                "duration": {
+                    "type": "string",
+                    "description": "Time range (e.g., '1h', '30m', '24h')",
+                    "default": "1h"
+                }
+            },
+            "required": ["query"]
+        }
+    ),
+    Tool(
+        name="check_service_health",
+        description="Check if a service is healthy (up metric = 1)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "service": {
+                    "type": "string",
+                    "description": "Service name to check"
+                }
+            },
+            "required": ["service"]
+        }
+    ),
+    Tool(
+        name="get_error_rate",
+        description="Get the error rate for a service over the last 5 minutes",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "service": {
+                    "type": "string",
+                    "description": "Service name"
+                }
+            },
+            "required": ["service"]
+        }
+    )
+]
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools"""
-    return [
-        Tool(
-            name="query_metrics",
-            description="Execute a PromQL query to get current metric values",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "PromQL query (e.g., 'up', 'rate(http_requests_total[5m])')"
-                    }
-                },
-                "required": ["query"]
-            }
-        ),
-        Tool(
-            name="query_metrics_range",
-            description="Execute a PromQL range query to get metrics over time",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "PromQL query"
-                    },
-                    "duration": {
-                        "type": "string",
-                        "description": "Time range (e.g., '1h', '30m', '24h')",
-                        "default": "1h"
-                    }
-                },
-                "required": ["query"]
-            }
-        ),
-        Tool(
-            name="check_service_health",
-            description="Check if a service is healthy (up metric = 1)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "service": {
-                        "type": "string",
-                        "description": "Service name to check"
-                    }
-                },
-                "required": ["service"]
-            }
-        ),
-        Tool(
-            name="get_error_rate",
-            description="Get the error rate for a service over the last 5 minutes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "service": {
-                        "type": "string",
-                        "description": "Service name"
-                    }
-                },
-                "required": ["service"]
-            }
-        )
-    ]
+    return TOOLS
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
@@ -162,7 +176,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
     if name == "query_metrics":
         query = arguments.get("query", "")
-        result = query_prometheus(query)
+        result = await asyncio.to_thread(query_prometheus, query)
 
         if result.get('success'):
             metrics = result.get('result', [])
@@ -182,7 +196,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "query_metrics_range":
         query = arguments.get("query", "")
         duration = arguments.get("duration", "1h")
-        result = query_prometheus_range(query, duration)
+        result = await asyncio.to_thread(query_prometheus_range, query, duration)
 
         if result.get('success'):
             metrics = result.get('result', [])
@@ -205,7 +219,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "check_service_health":
         service = arguments.get("service", "")
         query = f'up{{job="{service}"}}'
-        result = query_prometheus(query)
+        result = await asyncio.to_thread(query_prometheus, query)
 
         if result.get('success'):
             metrics = result.get('result', [])
@@ -225,7 +239,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     elif name == "get_error_rate":
         service = arguments.get("service", "")
         query = f'rate(http_requests_total{{job="{service}",status=~"5.."}}[5m])'
-        result = query_prometheus(query)
+        result = await asyncio.to_thread(query_prometheus, query)
 
         if result.get('success'):
             metrics = result.get('result', [])